@@ -0,0 +1,6 @@
+#
+# Shared code for preparing ATOMIC/EUREC4A P3 data sets for the archive
+#   The scripts at the top level of the repository import from here
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
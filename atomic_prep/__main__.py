@@ -0,0 +1,6 @@
+#
+# python -m atomic_prep <step> [options]: the same as the atomic-prep command
+#
+from atomic_prep.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,106 @@
+#
+# Align datasets with their own time axes (flight-level, remote-sensing, microphysics...) onto a common time base
+#   Source times are matched to the target times once per dataset with searchsorted, giving indices
+#   (and weights, for linear interpolation) that are then applied to every variable, over whole flights at once.
+#   Target times farther than tolerance from any source sample (nearest), or inside a gap in the
+#   source longer than tolerance (linear), get missing values.
+#   Only floating-point data are interpolated; flags, counts, strings, and times take the nearer of the
+#   two samples. A source with no samples gives missing values everywhere.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import numpy  as np
+import xarray as xr
+
+from atomic_prep import encoding
+
+def _ns(t):
+    return np.asarray(t, dtype="datetime64[ns]").astype(np.int64)
+
+#
+# Indices into (sorted) source times and weights: value = (1 - w) * source[i0] + w * source[i1]
+#
+def matches(target, source, method="nearest", tolerance=np.timedelta64(1, "s")):
+    target, source = _ns(target), _ns(source)
+    tol = np.asarray(tolerance, dtype="timedelta64[ns]").astype(np.int64)
+    if source.size == 0:
+        i = np.zeros(target.size, dtype=np.intp)
+        return i, i, np.zeros(target.size), np.zeros(target.size, dtype=bool)
+    i1  = np.clip(np.searchsorted(source, target), 1, max(source.size - 1, 1))
+    i0  = i1 - 1
+    if source.size == 1:
+        i0 = i1 = np.zeros_like(target)
+    d0, d1 = target - source[i0], source[i1] - target
+    if method == "nearest":
+        i  = np.where(np.abs(d0) <= np.abs(d1), i0, i1)
+        ok = np.abs(target - source[i]) <= tol
+        return i, i, np.zeros(target.size), ok
+    if method == "linear":
+        span = source[i1] - source[i0]
+        w  = np.where(span > 0, d0 / np.maximum(span, 1), 0.)
+        ok = (d0 >= 0) & (d1 >= 0) & (span <= tol)
+        return i0, i1, w, ok
+    raise ValueError("method must be 'nearest' or 'linear', not " + method)
+
+#
+# Missing value for each kind of data, and the type that can hold it
+#
+def _missing(dtype):
+    if dtype.kind in "mM":
+        return dtype, np.array("NaT", dtype=dtype)
+    if dtype.kind in "SU":
+        return dtype, dtype.type()
+    if dtype.kind == "O":
+        return dtype, None
+    return np.result_type(dtype, np.float32), np.nan
+
+def _apply(values, i0, i1, w, ok):
+    values = np.asarray(values)
+    dtype, missing = _missing(values.dtype)
+    if values.shape[0] == 0:
+        return np.full(ok.shape + values.shape[1:], missing, dtype=dtype)
+    w = w.reshape((-1,) + (1,) * (values.ndim - 1))
+    if values.dtype.kind in "fc":
+        out = values[i0] * (1 - w) + values[i1] * w if np.any(w) else values[i0]
+    else:
+        # Flags, counts, strings, and times can't be interpolated: nearest of the two
+        out = np.where(w < 0.5, values[i0], values[i1])
+    out = np.array(out, dtype=dtype)
+    out[~ok] = missing
+    return out
+
+#
+# ds on target times: every variable with a time dimension (first) is aligned; others are copied
+#
+def align(ds, target, method="nearest", tolerance=np.timedelta64(1, "s"), dim="time"):
+    if not np.all(np.diff(_ns(ds[dim].values)) >= 0):
+        ds = ds.sortby(dim)
+    i0, i1, w, ok = matches(target, ds[dim].values, method, tolerance)
+    out = xr.Dataset(coords={dim:target})
+    for name, var in ds.variables.items():
+        if name == dim:
+            continue
+        if dim in var.dims:
+            var = var.transpose(dim, ...)
+            out[name] = (var.dims, _apply(var.values, i0, i1, w, ok), var.attrs)
+        else:
+            out[name] = var
+    return out
+
+#
+# Align each of sources = {prefix:(dataset, method, tolerance)} to base's time axis and write one file.
+#   The base is written first; each source is then aligned and appended, one at a time.
+#   Variables whose names are already in the file get the source's prefix.
+#
+def join(path, base, sources, dim="time"):
+    base.to_netcdf(path, encoding=encoding.encoding(base))
+    names = set(base.variables)
+    for prefix, (ds, method, tolerance) in sources.items():
+        if ds.sizes.get(dim, 0) == 0:
+            print("  No {} samples to align".format(prefix))
+            continue
+        aligned = align(ds, base[dim].values, method, tolerance, dim).drop_vars(dim)
+        aligned = aligned.rename({v:prefix + "_" + v for v in aligned.variables if v in names})
+        aligned.attrs = {}
+        aligned.to_netcdf(path, mode="a", encoding=encoding.encoding(aligned))
+        names |= set(aligned.variables)
@@ -0,0 +1,164 @@
+#
+# Helpers for the flight level data provided by NOAA/AOC
+#   AOC files report UTC time of day as separate hour, minute, and second variables (HH, MM, SS)
+#   Level-1 files in the netCDF classic or 64-bit offset formats are memory-mapped (open_level1) so that
+#   only the pages holding the few columns used are ever read; HDF5-based files are opened with xarray
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import numpy  as np
+import xarray as xr
+
+seconds_per_day = 86400
+# A drop in time of day larger than this between consecutive samples is taken to be a midnight crossing
+#   (smaller steps backward are treated as glitches in the AOC clock, not a new day)
+rollover_threshold = seconds_per_day // 2
+time_variables = ["HH", "MM", "SS"]
+
+#
+# Mask is false where any of the time fields are NA
+#
+def valid_time_mask(hours, mins, secs):
+    hours, mins, secs = (np.asarray(a) for a in (hours, mins, secs))
+    return ~(np.isnan(hours) | np.isnan(mins) | np.isnan(secs))
+
+def seconds_of_day(hours, mins, secs):
+    return (np.asarray(hours, dtype=np.float64) * 3600. +
+            np.asarray(mins,  dtype=np.float64) *   60. +
+            np.asarray(secs,  dtype=np.float64))
+
+#
+# Number of midnights crossed before each sample, from the time of day in seconds
+#
+def day_offsets(sod):
+    sod = np.asarray(sod)
+    offsets = np.zeros(sod.shape, dtype=np.int64)
+    if sod.size > 1:
+        np.cumsum(np.diff(sod) < -rollover_threshold, out=offsets[1:])
+    return offsets
+
+def crosses_midnight(hours, mins, secs):
+    offsets = day_offsets(seconds_of_day(hours, mins, secs))
+    return offsets.size > 0 and bool(offsets[-1] > 0)
+
+#
+# Time coordinate as datetime64[ns] from HH/MM/SS (with no missing values) and the UTC date the flight started
+#   Samples after midnight are assigned to the following day
+#
+def time_index(date, hours, mins, secs):
+    sod = seconds_of_day(hours, mins, secs)
+    ns  = np.round((sod + day_offsets(sod) * seconds_per_day) * 1e9).astype(np.int64)
+    return np.datetime64(date, "ns") + ns.astype("timedelta64[ns]")
+
+#
+# Memory-mapped Level-1 file, read with scipy's netCDF-3 reader
+#   Indexing by name gives a variable with dims and attrs like xarray's; indexing that with {dim:slice}
+#   is a view into the mapped file (with {dim:array}, a copy of just those samples), and only .values
+#   decodes data, applying fill values and scaling
+#   as xarray does (the dtypes follow xarray's choices, so both paths give the same results)
+#
+classic_magic = (b"CDF\x01", b"CDF\x02")
+# CF attributes applied when decoding, which xarray keeps in .encoding rather than .attrs
+decoding_attrs = ["_FillValue", "missing_value", "scale_factor", "add_offset"]
+
+def is_classic(path):
+    with open(path, "rb") as fh:
+        return fh.read(4) in classic_magic
+
+def _attr(value):
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else value
+
+def _decode(data, attrs):
+    values = np.asarray(data)
+    fills  = [attrs[a] for a in ["_FillValue", "missing_value"] if a in attrs]
+    scale, offset = attrs.get("scale_factor"), attrs.get("add_offset")
+    if not fills and scale is None and offset is None:
+        return values.astype(values.dtype.newbyteorder("="))
+    if values.dtype.kind == "f":
+        dtype = values.dtype.newbyteorder("=")
+    elif values.dtype.itemsize <= 2 and offset is None:
+        dtype = np.dtype(np.float32)
+    else:
+        dtype = np.dtype(np.float64)
+    decoded = values.astype(dtype)
+    if fills:
+        decoded[np.isin(values, np.concatenate([np.ravel(f) for f in fills]).astype(np.float64))] = np.nan
+    if scale is not None:
+        decoded *= scale
+    if offset is not None:
+        decoded += offset
+    return decoded
+
+class MappedVariable:
+    def __init__(self, var, data=None):
+        self._var  = var
+        self._data = var.data if data is None else data
+        self.dims  = var.dimensions
+        self.attrs = {k:_attr(v) for k, v in var._attributes.items() if k not in decoding_attrs}
+
+    def __getitem__(self, key):
+        return MappedVariable(self._var, self._data[tuple(key.get(d, slice(None)) for d in self.dims)])
+
+    @property
+    def values(self):
+        return _decode(self._data, self._var._attributes)
+
+class MappedLevel1:
+    def __init__(self, path):
+        from scipy.io import netcdf_file
+        self._file = netcdf_file(path, "r", mmap=True, maskandscale=False)
+
+    def __getitem__(self, name):
+        return MappedVariable(self._file.variables[name])
+
+    def close(self):
+        self._file.close()
+
+#
+# Values of a variable at index along its only dimension
+#   Memory-mapped samples are indexed before decoding, so only the valid ones are decoded; variables
+#   opened with xarray are read over the whole window and indexed in memory, since netCDF4 reads an
+#   irregular index one element at a time
+#
+def _take(var, index):
+    if isinstance(var, MappedVariable):
+        return var[{var.dims[0]:index}].values
+    return var.values[index]
+
+#
+# Level-1 file ready for extract(): memory-mapped if classic/64-bit offset, otherwise opened lazily with xarray
+#
+def open_level1(path):
+    if is_classic(path):
+        return MappedLevel1(path)
+    return xr.open_dataset(path, decode_times = False)
+
+#
+# Extract the variables in var_mapping (summary name:AOC name) from an open AOC file (see open_level1),
+#   keeping only samples with a valid time
+#   The valid-sample index is computed once from HH/MM/SS and applied identically to every variable.
+#   Variables are read one at a time over the window spanned by the valid samples,
+#   so only the mapped columns are ever read from the (lazily opened) Level-1 file
+#   rec, a telemetry.Recorder, if given, records the time-index and extract stages separately
+#
+def extract(full, date, var_mapping, rec=None):
+    if rec is not None:
+        rec.stage("time-index")
+    dim   = full[time_variables[0]].dims[0]
+    hms   = [full[v].values for v in time_variables]
+    valid = valid_time_mask(*hms)
+    index = np.flatnonzero(valid)
+    start = index[0] if index.size else 0
+    window = slice(start, index[-1] + 1 if index.size else 0)
+    index -= start
+
+    subset = xr.Dataset(coords = {"time":time_index(date, *(t[valid] for t in hms))})
+    if rec is not None:
+        rec.stage("extract")
+    for key, value in var_mapping.items():
+        atts = dict(full[value].attrs)
+        atts["AOC_name"] = value
+        subset[key] = xr.DataArray(_take(full[value][{dim:window}], index),
+                                   dims=["time"],
+                                   attrs=atts)
+    return subset
@@ -0,0 +1,87 @@
+#
+# Edit global and per-variable attributes, fix variable types, and rename files in a single pass per file
+#   Replaces loops of ncatted/ncap2/zmv commands, each of which rewrote the whole file.
+#   Attribute edits are made in place with netCDF4, so the data are not rewritten;
+#   only files with a variable whose type must change are copied (once) through xarray.
+#   Fill values and valid ranges are stored with the type of their variable, as CF and OpenDAP require.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import os
+import pathlib
+import re
+
+import numpy   as np
+import netCDF4
+
+# Attributes that must have the variable's own type
+typed_attrs = ["_FillValue", "missing_value", "valid_min", "valid_max", "valid_range"]
+
+def _typed(name, value, dtype):
+    if name in typed_attrs and dtype.kind in "fiu":
+        return np.asarray(value).astype(dtype)
+    return value
+
+#
+# Apply edits to one file; returns the (possibly new) path
+#   global_attrs   : {name:value} to add or overwrite
+#   delete_global  : names of global attributes to remove, if present
+#   variable_attrs : {variable:{name:value}}; variables not in the file are skipped;
+#                    fill values and valid ranges are cast to the variable's type (after casts)
+#   casts          : {variable:dtype}, e.g. unsigned ints OpenDAP can't serve
+#   rename         : (pattern, replacement) applied with re.fullmatch/re.sub to the file name
+#
+def patch(path, global_attrs={}, delete_global=[], variable_attrs={}, casts={}, rename=None):
+    path = pathlib.Path(path)
+    with netCDF4.Dataset(path) as nc:
+        data_model = nc.data_model
+        recast = {v:np.dtype(t) for v, t in casts.items()
+                  if v in nc.variables and nc[v].dtype != np.dtype(t)}
+
+    if recast:
+        _rewrite(path, data_model, recast, global_attrs, delete_global, variable_attrs)
+    else:
+        with netCDF4.Dataset(path, "r+") as nc:
+            for name, value in global_attrs.items():
+                nc.setncattr(name, value)
+            for name in delete_global:
+                if name in nc.ncattrs():
+                    nc.delncattr(name)
+            for v, atts in variable_attrs.items():
+                if v in nc.variables:
+                    for name, value in atts.items():
+                        nc[v].setncattr(name, _typed(name, value, nc[v].dtype))
+
+    if rename is not None and re.fullmatch(rename[0], path.name):
+        new_path = path.with_name(re.sub(rename[0], rename[1], path.name))
+        os.replace(path, new_path)
+        path = new_path
+    return path
+
+#
+# Variable types can't be changed in place, so copy the file once with every edit applied
+#
+def _rewrite(path, data_model, recast, global_attrs, delete_global, variable_attrs):
+    import xarray as xr
+
+    with xr.open_dataset(path, decode_cf=False) as ds:
+        ds = ds.load()
+    for v, dtype in recast.items():
+        atts = dict(ds[v].attrs)
+        for name in typed_attrs:
+            if name in atts:
+                atts[name] = np.asarray(atts[name]).astype(dtype)
+        ds[v] = ds[v].astype(dtype).assign_attrs(atts)
+        ds[v].encoding.pop("dtype", None)
+    ds.attrs.update(global_attrs)
+    for name in delete_global:
+        ds.attrs.pop(name, None)
+    for v, atts in variable_attrs.items():
+        if v in ds.variables:
+            ds[v].attrs.update({name:_typed(name, value, ds[v].dtype) for name, value in atts.items()})
+
+    # xarray would otherwise give every float variable without one a _FillValue of NaN
+    encoding = {v:{"_FillValue":None} for v in ds.variables if "_FillValue" not in ds[v].attrs}
+    tmp = path.with_name(path.name + ".tmp")
+    ds.to_netcdf(tmp, format=data_model, encoding=encoding)
+    os.replace(tmp, path)
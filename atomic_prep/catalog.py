@@ -0,0 +1,117 @@
+#
+# Persistent index of the time coverage of Level-2/3 files, and queries against it
+#   For each file the index (a JSON file) holds the product, flight date, first and last times,
+#   the number of samples, the airborne window (first and last times with altitude above
+#   airborne_altitude), and every stride-th time, from which the range of indices overlapping an
+#   interval can be found without opening the file.
+#   Entries are rebuilt only for files whose size or modification time has changed.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import json
+import pathlib
+import re
+
+import numpy  as np
+
+from atomic_prep import manifest
+
+stride = 1000
+# Altitude (m) above which the aircraft is taken to be airborne
+airborne_altitude = 50.
+
+def _seconds(t):
+    return np.asarray(t, dtype="datetime64[s]").astype(np.int64)
+
+def _time(s):
+    return str(np.datetime64(int(s), "s"))
+
+def describe(product, f):
+    import xarray as xr
+    with xr.open_dataset(f) as ds:
+        times = _seconds(ds.time.values)
+        alt   = ds.alt.values if "alt" in ds.variables else None
+    entry = {"product":product,
+             "path":str(f),
+             "signature":manifest.input_signature(f),
+             "flight":re.search(r"(20\d{6})", pathlib.Path(f).name).group(1),
+             "start":_time(times.min()), "end":_time(times.max()),
+             "samples":int(times.size),
+             "sorted":bool(np.all(np.diff(times) >= 0)),
+             "stride":stride,
+             "sparse_times":times[::stride].tolist()}
+    if alt is not None:
+        airborne = np.flatnonzero(alt > airborne_altitude)
+        if airborne.size:
+            entry["airborne"] = [_time(times[airborne[0]]), _time(times[airborne[-1]])]
+    return entry
+
+#
+# Files keyed by the date (YYYYMMDD) in their names, so products can be matched by date rather than by position
+#
+def files_by_date(files):
+    dated = {}
+    for f in files:
+        match = re.search(r"(20\d{6})", f.name)
+        if match:
+            dated[match.group(1)] = f
+    return dated
+
+def load(path):
+    path = pathlib.Path(path)
+    if not path.exists():
+        return []
+    with open(path) as fh:
+        return json.load(fh)
+
+#
+# Index files = {product:[files]}, reusing entries for unchanged files
+#
+def build(path, files):
+    old = {e["path"]:e for e in load(path)}
+    entries = []
+    for product, product_files in files.items():
+        for f in product_files:
+            e = old.get(str(f))
+            if e is None or e["signature"] != manifest.input_signature(f):
+                e = describe(product, f)
+            entries.append(e)
+    with open(path, "w") as fh:
+        json.dump(entries, fh)
+    return entries
+
+#
+# Range of sample indices [start, stop) that includes every time in [t0, t1], from the sparse times
+#
+def _index_range(e, t0, t1):
+    sparse = np.asarray(e["sparse_times"])
+    if not e["sorted"]:
+        return slice(0, e["samples"])
+    first = max(np.searchsorted(sparse, t0, side="right") - 1, 0)
+    last  = np.searchsorted(sparse, t1, side="right")
+    return slice(int(first * e["stride"]), int(min(last * e["stride"], e["samples"])))
+
+#
+# Files overlapping the UTC interval [start, end] (anything np.datetime64 accepts), optionally only
+#   some products and/or only while airborne, with the range of indices along time to read from each
+#
+def query(entries, start, end, products=None, airborne=False):
+    t0, t1 = _seconds(np.datetime64(start)), _seconds(np.datetime64(end))
+    matches = []
+    for e in entries:
+        if products is not None and e["product"] not in products:
+            continue
+        lo, hi = e["airborne"] if airborne and "airborne" in e else (e["start"], e["end"])
+        lo, hi = max(t0, _seconds(np.datetime64(lo))), min(t1, _seconds(np.datetime64(hi)))
+        if lo <= hi:
+            matches.append({"product":e["product"], "path":e["path"], "flight":e["flight"],
+                            "isel":_index_range(e, lo, hi)})
+    return matches
+
+#
+# Data from the files returned by query(), limited to [start, end]
+#
+def open_subset(match, start, end):
+    import xarray as xr
+    with xr.open_dataset(match["path"]) as ds:
+        return ds.isel(time=match["isel"]).sel(time=slice(np.datetime64(start), np.datetime64(end))).load()
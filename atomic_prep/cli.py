@@ -0,0 +1,223 @@
+#
+# One command for every processing step, and for checking the results: atomic-prep <step> [options]
+#   Dates, directories, and the number of worker processes are taken from the command line
+#   (defaults are those in the product specs). Modules that are slow to import - xarray, dask,
+#   netCDF4, matplotlib - are loaded only by the step that runs, and only once it does real work,
+#   so --help, --list, and --dry-run return immediately.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import argparse
+import dataclasses
+import datetime
+import importlib
+import os
+import pathlib
+
+#
+# Steps built by atomic_prep.engine: command name -> module in atomic_prep.products
+#
+engine_steps = {"flight-level"  :"flight_level",
+                "microphysics"  :"microphysics",
+                "remote-sensing":"remote_sensing"}
+
+quicklook_plots = ["coverage", "axbt"]
+
+def _date(s):
+    try:
+        return datetime.datetime.strptime(s, "%Y%m%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError("dates are YYYYMMDD, not {}".format(s))
+
+# Checked here rather than with choices=, which argparse also applies to an empty list of plots
+def _plot(s):
+    if s not in quicklook_plots:
+        raise argparse.ArgumentTypeError("plots are {}, not {}".format(", ".join(quicklook_plots), s))
+    return s
+
+def _matches(name, dates):
+    return not dates or any(f"{d:%Y%m%d}" in name for d in dates)
+
+def _force(product):
+    tags = [t for t in os.environ.get("ATOMIC_PREP_FORCE", "").split(",") if t]
+    os.environ["ATOMIC_PREP_FORCE"] = ",".join(tags + [product])
+
+def _spec(module, args):
+    spec = importlib.import_module("atomic_prep.products." + module).spec
+    changes = {k:v for k, v in [("input_dir", args.input_dir), ("output_dir", args.output_dir)] if v is not None}
+    return dataclasses.replace(spec, **changes)
+
+#
+# Units of work for the dates asked for: products processed by date accept any date,
+#   others (e.g. one unit per input file) are selected by the date in their names
+#
+def _units(spec, dates):
+    from atomic_prep import engine
+    units = spec.units(spec)
+    if not dates:
+        return units
+    if units and all(isinstance(u, datetime.date) for u in units):
+        return dates
+    return [u for u in units if _matches(engine.target_name(spec, u), dates)]
+
+def _status(is_stale):
+    try:
+        return "build" if is_stale() else "up to date"
+    except FileNotFoundError as e:
+        return "missing input ({})".format(e)
+
+def engine_step(args):
+    from atomic_prep import engine
+    spec = _spec(engine_steps[args.step], args)
+    if args.force:
+        _force(spec.product)
+    units = _units(spec, args.dates)
+    if args.list or args.dry_run:
+        for u in units:
+            print(engine.target_name(spec, u) + ("  " + _status(lambda: engine.is_stale(spec, u)) if args.dry_run else ""))
+        return 0
+    results, failures = engine.run(spec, units, workers=args.workers)
+    return 1 if failures else 0
+
+def axbt_step(args):
+    from atomic_prep import engine
+    spec = _spec("axbt", args)
+    if args.force:
+        _force(spec.product)
+    if args.list or args.dry_run:
+        for f in spec.inputs(spec, "campaign"):
+            print(f)
+        if args.dry_run:
+            print("AXBT files: " + _status(lambda: engine.is_stale(spec, "campaign")))
+        return 0
+    results, failures = engine.run(spec, workers=args.workers)
+    return 1 if failures else 0
+
+def wsra_step(args):
+    from atomic_prep.products import wsra
+    files = [f for f in wsra.files(args.input_dir or wsra.dataDir) if _matches(f.name, args.dates)]
+    if args.list or args.dry_run:
+        for f in files:
+            print(f)
+        return 0
+    from atomic_prep import parallel
+    results, failures = parallel.run(wsra.patch, files, args.workers)
+    return 1 if failures else 0
+
+#
+# PDF files and the items on their pages: (file name, page function name, title, items)
+#
+def _quicklook_pages(args):
+    from atomic_prep.catalog import files_by_date
+    pages = []
+    if "coverage" in args.plots:
+        fl_files = files_by_date(sorted(args.flight_level_dir.glob("*.nc")))
+        cl_files = files_by_date(sorted(args.cloud_dir.glob("*.cdf")))
+        pages.append(("flight-level-and-clouds.pdf", "coverage_page", None,
+                      [(d, fl_files[d], cl_files[d]) for d in sorted(fl_files.keys() & cl_files.keys())
+                                                     if _matches(d, args.dates)]))
+    if "axbt" in args.plots:
+        pages.append(("AXBT_Level_3.pdf", "profile_page", "ATOMIC AXBT profiles: Level 3",
+                      [[args.axbt_dir.joinpath("Level_3", "P3_AXBT_Level_3.nc")]]))
+        pages.append(("AXBT_Level_2.pdf", "profile_page", "ATOMIC AXBT profiles: Level 2",
+                      [sorted(args.axbt_dir.joinpath("Level_2").glob("*.nc"))]))
+    return pages
+
+def quicklook_step(args):
+    args.plots = args.plots or quicklook_plots
+    pages = _quicklook_pages(args)
+    if args.list or args.dry_run:
+        for name, page, title, items in pages:
+            print("{}: {} pages".format(name, len(items)))
+        return 0
+    import functools
+    from atomic_prep import quicklook
+    output_dir = args.output_dir or pathlib.Path(".")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    documents = {}
+    for name, page, title, items in pages:
+        make_page = getattr(quicklook, page)
+        if title is not None:
+            make_page = functools.partial(make_page, title=title)
+        documents[output_dir.joinpath(name)] = (make_page, items)
+    quicklook.write_pdfs(documents, workers=args.workers)
+    return 0
+
+#
+# netCDF files given directly or found (recursively) in the directories given
+#
+def _netcdf_files(paths, dates):
+    files = []
+    for p in paths:
+        files += sorted(p.rglob("*.nc")) if p.is_dir() else [p]
+    return [f for f in files if _matches(f.name, dates)]
+
+def _attr(s):
+    name, sep, value = s.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("attributes are NAME=VALUE, not {}".format(s))
+    return name, value
+
+def validate_step(args):
+    files = _netcdf_files(args.paths, args.dates)
+    if args.list or args.dry_run:
+        for f in files:
+            print(f)
+        return 0
+    from atomic_prep import validate
+    entries = validate.run(files, args.report, fix=args.fix, global_attrs=dict(args.attrs), workers=args.workers)
+    for e in entries:
+        for p in e["fixed"]:
+            print("{}: fixed {}: {}".format(e["file"], p["variable"] or "global", p["message"]))
+        for p in e["problems"]:
+            print("{}: {} {}: {}".format(e["file"], p["severity"], p["variable"] or "global", p["message"]))
+    errors = sum(e["errors"] for e in entries)
+    print("{} files, {} with errors".format(len(entries), sum(e["errors"] > 0 for e in entries)))
+    return 1 if errors else 0
+
+def parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: ATOMIC_PREP_WORKERS or the number of CPUs)")
+    common.add_argument("--list", action="store_true", help="list the units of work and exit")
+    common.add_argument("-n", "--dry-run", action="store_true",
+                        help="list the units of work and whether each would be built, without reading any data")
+    dated = argparse.ArgumentParser(add_help=False)
+    dated.add_argument("-d", "--dates", nargs="+", type=_date, default=None, metavar="YYYYMMDD",
+                       help="process only these dates (default: all)")
+    paths = argparse.ArgumentParser(add_help=False)
+    paths.add_argument("-i", "--input-dir",  type=pathlib.Path, default=None, help="directory with the input files")
+    paths.add_argument("-o", "--output-dir", type=pathlib.Path, default=None, help="directory for the output files")
+    force = argparse.ArgumentParser(add_help=False)
+    force.add_argument("-f", "--force", action="store_true", help="rebuild even if outputs are up to date")
+
+    p = argparse.ArgumentParser(prog="atomic-prep", description="Prepare ATOMIC/EUREC4A P3 data sets for the archive")
+    steps = p.add_subparsers(dest="step", metavar="step", required=True)
+    for name, module in engine_steps.items():
+        s = steps.add_parser(name, parents=[common, dated, paths, force], help=f"build the {name} product")
+        s.set_defaults(func=engine_step)
+    s = steps.add_parser("axbt", parents=[common, paths, force], help="build the AXBT Level-2 and Level-3 files")
+    s.set_defaults(func=axbt_step)
+    s = steps.add_parser("wsra-attrs", parents=[common, dated], help="add attributes to and rename WSRA Level-4 files")
+    s.add_argument("-i", "--input-dir", type=pathlib.Path, default=None, help="directory with the WSRA files")
+    s.set_defaults(func=wsra_step)
+    s = steps.add_parser("quicklook", parents=[common, dated], help="quicklook PDF plots for QC")
+    s.add_argument("plots", nargs="*", type=_plot, metavar="plot",
+                   help="plots to make: {} (default: all)".format(", ".join(quicklook_plots)))
+    s.add_argument("--flight-level-dir", type=pathlib.Path, default=pathlib.Path("flight-level-summary/Level_2"))
+    s.add_argument("--cloud-dir",        type=pathlib.Path, default=pathlib.Path("cloud-summary"))
+    s.add_argument("--axbt-dir",         type=pathlib.Path, default=pathlib.Path("Fairall-summary-data/AXBT"))
+    s.add_argument("-o", "--output-dir", type=pathlib.Path, default=None, help="directory for the PDF files")
+    s.set_defaults(func=quicklook_step)
+    s = steps.add_parser("validate", parents=[common, dated], help="check netCDF files for CF/OpenDAP compliance")
+    s.add_argument("paths", nargs="+", type=pathlib.Path, help="files, or directories searched for *.nc files")
+    s.add_argument("-r", "--report", type=pathlib.Path, default=None, help="write the results to this JSON file")
+    s.add_argument("--fix", action="store_true", help="fix, in place, the problems that can be fixed from the header")
+    s.add_argument("-a", "--attr", dest="attrs", type=_attr, action="append", default=[], metavar="NAME=VALUE",
+                   help="value for a missing global attribute, used with --fix")
+    s.set_defaults(func=validate_step)
+    return p
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,118 @@
+#
+# Collocate satellite pixels with the P3 flight track
+#   GOES-16 CLAVR-x retrievals on the AERIS THREDDS server are 1-minute granules on a fixed 2 km grid
+#   around Barbados, so the nearest pixel to any position can be found from an index built once from
+#   the grid's latitude and longitude. Only granules within the flight's time window are read, and
+#   only the block of pixels spanned by the track during each minute.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy  as np
+import xarray as xr
+from scipy.spatial import cKDTree
+
+from atomic_prep import remote
+
+earth_radius_km = 6371.
+granule_url = ("https://observations.ipsl.fr/thredds/dodsC/EUREC4A/SATELLITES/GOES-E/2km_01min/"
+               "{t:%Y}/{t:%Y_%m_%d}/clavrx_goes16_{t:%Y_%j_%H%M}_BARBADOS-2KM-FD.level2.nc")
+auth = ("eurec4a", "barbados")
+lat_name, lon_name = "latitude", "longitude"
+# Granules tried, in turn, for the grid before giving up
+grid_attempts = 10
+
+def _xyz(lat, lon):
+    lat, lon = np.deg2rad(lat), np.deg2rad(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+#
+# Nearest-pixel index for a fixed 2-D grid of latitude and longitude (off-earth pixels may be NaN)
+#
+class GridIndex:
+    def __init__(self, lat, lon, dims):
+        lat, lon   = np.asarray(lat), np.asarray(lon)
+        self.shape = lat.shape
+        self.dims  = dims
+        self.pixel = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        self.tree  = cKDTree(_xyz(lat.ravel()[self.pixel], lon.ravel()[self.pixel]))
+
+    # Row and column of the nearest pixel to each position, and the distance in km
+    def query(self, lat, lon):
+        chord, i = self.tree.query(_xyz(lat, lon))
+        rows, cols = np.unravel_index(self.pixel[i], self.shape)
+        return rows, cols, 2 * earth_radius_km * np.arcsin(np.minimum(chord / 2, 1.))
+
+# URL of the granule starting at minute t (datetime64 or datetime)
+def granule_url_at(t):
+    return granule_url.format(t=np.datetime64(t, "m").astype(datetime.datetime))
+
+#
+# Index for the grid - the grid is fixed, so any granule will do. Granules starting at the times
+#   given are tried in order (at most grid_attempts of them), so one missing granule doesn't stop a flight
+#
+def grid_index(times):
+    errors = []
+    for t in np.atleast_1d(times)[:grid_attempts]:
+        url = granule_url_at(t)
+        try:
+            grid = remote.fetch(url, [lat_name, lon_name], auth=auth)
+        except Exception as e:
+            print("  Couldn't read grid from " + url + ": " + repr(e))
+            errors.append(e)
+            continue
+        return GridIndex(grid[lat_name].values, grid[lon_name].values, grid[lat_name].dims)
+    raise RuntimeError("No granule with a readable grid among {} tried".format(len(errors))) from (errors[-1] if errors else None)
+
+#
+# Each sample is matched to the granule nearest in time (granules are labeled by their starting minute)
+#
+def granule_minutes(times):
+    return (np.asarray(times, dtype="datetime64[s]") + np.timedelta64(30, "s")).astype("datetime64[m]")
+
+#
+# Values of variables at the pixels nearest the track (time, lat, lon) - a dataset along the track's time axis
+#
+def collocate(times, lat, lon, variables, index, workers=8):
+    times, lat, lon = np.asarray(times), np.asarray(lat), np.asarray(lon)
+    # Samples without a position aren't matched
+    ok = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    rows, cols, d  = index.query(lat[ok], lon[ok])
+    dist = np.full(len(times), np.nan)
+    dist[ok] = d
+    minutes, which = np.unique(granule_minutes(times[ok]), return_inverse=True)
+
+    def read(m):
+        local   = np.flatnonzero(which == m)
+        samples = ok[local]
+        r, c = rows[local], cols[local]
+        box  = {index.dims[0]:slice(int(r.min()), int(r.max()) + 1),
+                index.dims[1]:slice(int(c.min()), int(c.max()) + 1)}
+        url  = granule_url_at(minutes[m])
+        try:
+            block = remote.fetch(url, variables, box, auth=auth)
+        except Exception as e:
+            print("  Couldn't read " + url + ": " + repr(e))
+            return m, samples, None
+        return m, samples, block.isel({index.dims[0]:xr.DataArray(r - r.min()),
+                                    index.dims[1]:xr.DataArray(c - c.min())})
+
+    out = xr.Dataset(coords={"time":times})
+    values = {v:np.full(len(times), np.nan) for v in variables}
+    attrs  = {v:{} for v in variables}
+    granule_time = np.full(len(times), np.datetime64("NaT"), dtype="datetime64[ns]")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for m, samples, block in pool.map(read, range(minutes.size)):
+            if block is not None:
+                for v in variables:
+                    values[v][samples] = block[v].values
+                    attrs[v] = block[v].attrs
+                granule_time[samples] = minutes[m]
+    for v in variables:
+        out[v] = ("time", values[v], attrs[v])
+    out["granule_time"]   = ("time", granule_time, {"long_name":"start time of the GOES-16 granule"})
+    out["pixel_distance"] = ("time", dist, {"long_name":"distance from aircraft to pixel center",
+                                            "units":"km"})
+    return out
@@ -0,0 +1,71 @@
+#
+# Unit conversions and derived variables, computed together in a single pass over each chunk of data
+#   Every output is a new array computed from the inputs as read (e.g. mixing ratio uses temperature in C
+#   even though temperature itself is converted to K), so no variable aliases or modifies another.
+#   Works on NumPy- and dask-backed datasets alike; numexpr is used for the longer expressions if installed.
+#   NumPy, numexpr, and xarray are imported when something is computed, so product specs can refer to
+#   these functions without importing them.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import dataclasses
+
+#
+# func(*inputs) -> array; attrs for the new variable
+#
+@dataclasses.dataclass
+class Derived:
+    func   : callable
+    inputs : list
+    attrs  : dict = dataclasses.field(default_factory=dict)
+
+def kelvin(t):
+    return t + 273.15
+
+# Pitch used for radar calculations: 1.1 degrees subtracted to align with the W-band radar
+def radar_pitch(pitch):
+    return pitch - 1.1
+
+# Mixing ratio calculation from Chris Fairall <Chris.Fairall@noaa.gov>
+# p (mb), x = temperature (C), h = relative humidity (%)
+def qair3(p, x, h):
+    try:
+        import numexpr
+    except ImportError:
+        numexpr = None
+    if numexpr is not None:
+        es = numexpr.evaluate("6.112*exp(17.502*x/(x+241.0))*(1.0007+3.46e-6*p)*h/100.")
+        return numexpr.evaluate("es*622./(p-.378*es)")
+    import numpy as np
+    es=6.112*np.exp(17.502*x/(x+241.0))*(1.0007+3.46e-6*p)*h/100.
+    return(es*622./(p-.378*es))
+
+#
+# Convert to_kelvin variables C -> K and add derived = {name:Derived} in one pass
+#
+def apply(ds, to_kelvin=[], derived={}):
+    import numpy  as np
+    import xarray as xr
+    outputs = list(to_kelvin) + list(derived.keys())
+    if not outputs:
+        return ds
+    inputs = list(dict.fromkeys(list(to_kelvin) + [v for d in derived.values() for v in d.inputs]))
+
+    def kernel(*arrays):
+        a = dict(zip(inputs, arrays))
+        return tuple([kelvin(a[v]) for v in to_kelvin] +
+                     [d.func(*(a[v] for v in d.inputs)) for d in derived.values()])
+
+    results = xr.apply_ufunc(kernel, *[ds[v] for v in inputs],
+                             output_core_dims=[[]] * len(outputs),
+                             dask="parallelized",
+                             keep_attrs=False,
+                             output_dtypes=[np.float64] * len(outputs))
+    if len(outputs) == 1:
+        results = (results,)
+    ds = ds.copy()
+    for v, r in zip(to_kelvin, results):
+        ds[v] = r.assign_attrs(dict(ds[v].attrs, units="K"))
+    for (name, d), r in zip(derived.items(), results[len(to_kelvin):]):
+        ds[name] = r.assign_attrs(dict(d.attrs))
+    return ds
@@ -0,0 +1,47 @@
+#
+# Output encodings shared by all products: compression, chunking, packed types, and fill values
+#   - numeric variables are compressed (zlib + shuffle)
+#   - chunks span whole records along every dimension except time, which is chunked to about
+#     chunk_elements values per chunk - good for both time-series and per-profile access
+#   - float64 data are written as float32 unless listed in keep_double;
+#     packing = {variable:(scale_factor, add_offset, dtype)} writes scaled integers
+#   - _FillValue matches the type on disk (NaN for floats, the most negative value for packed ints)
+#     and is omitted for coordinates
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import numpy as np
+
+time_units     = "seconds since 2020-01-01"
+chunk_elements = 2**18
+complevel      = 4
+
+# Latitude and longitude need more than 7 significant digits
+default_keep_double = ["lat", "lon", "time"]
+
+def _chunks(var, time_dim):
+    other = int(np.prod([n for d, n in var.sizes.items() if d != time_dim]))
+    return tuple(max(1, min(n, chunk_elements // max(other, 1))) if d == time_dim else max(n, 1)
+                 for d, n in var.sizes.items())
+
+def encoding(ds, keep_double=default_keep_double, packing={}, time_dim="time"):
+    enc = {}
+    for name, var in ds.variables.items():
+        e = {}
+        if name == time_dim:
+            e.update({"units":time_units, "dtype":"double"})
+        if var.dtype.kind in "fiu" and var.ndim > 0:
+            e.update({"zlib":True, "complevel":complevel, "shuffle":True, "chunksizes":_chunks(var, time_dim)})
+        if name in packing:
+            scale, offset, dtype = packing[name]
+            e.update({"scale_factor":scale, "add_offset":offset, "dtype":dtype,
+                      "_FillValue":np.iinfo(dtype).min})
+        elif var.dtype.kind == "f":
+            dtype = var.dtype if (name in keep_double or var.dtype.itemsize <= 4) else np.dtype(np.float32)
+            e.update({"dtype":np.dtype(dtype).name,
+                      "_FillValue":None if name in ds.coords else np.dtype(dtype).type(np.nan)})
+        elif name in ds.coords:
+            e["_FillValue"] = None
+        if e:
+            enc[name] = e
+    return enc
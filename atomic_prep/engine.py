@@ -0,0 +1,155 @@
+#
+# Build the files for a Product (atomic_prep.product): one output per unit of work (or those of spec.write),
+#   skipping units whose inputs and settings are unchanged (atomic_prep.manifest), recording per-stage
+#   telemetry, writing with the shared compression/packing (atomic_prep.encoding), and processing units
+#   in parallel (atomic_prep.parallel)
+#   Modules that handle data are imported only when a unit is built, so that checking which units
+#   are out of date (is_stale) is quick
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import datetime
+import functools
+import pathlib
+import re
+
+from atomic_prep import manifest, parallel
+
+def label(unit):
+    if isinstance(unit, datetime.date):
+        return f"{unit:%Y%m%d}"
+    if isinstance(unit, pathlib.Path):
+        return unit.stem
+    return str(unit)
+
+#
+# Drop, rename, units, standard names, and attributes, as listed in the spec
+#
+def cf_fixup(spec, ds):
+    ds = ds.drop_vars([v for v in spec.drop if v in ds.variables]).rename(spec.rename)
+    for v, units in spec.units_attrs.items():
+        ds[v].attrs["units"] = units
+    for v, name in spec.standard_names.items():
+        ds[v].attrs["standard_name"] = name
+    for v, atts in spec.attrs.items():
+        ds[v].attrs.update(atts)
+    for v, names in spec.delete_attrs.items():
+        for name in names:
+            ds[v].attrs.pop(name, None)
+    return ds
+
+def write(spec, ds, path):
+    from atomic_prep import encoding
+    enc = encoding.encoding(ds, packing=spec.packing)
+    if ds.chunks:
+        # Dask-backed data: one chunk in memory at a time - units are already spread across processes
+        import dask
+        with dask.config.set(scheduler="synchronous"):
+            ds.to_netcdf(path, encoding=enc)
+    else:
+        ds.to_netcdf(path, encoding=enc)
+
+# Modules every output depends on; a change to any of them (or to spec.modules) makes every unit stale
+modules = ["atomic_prep.engine", "atomic_prep.product", "atomic_prep.derived", "atomic_prep.encoding"]
+
+def sources(spec):
+    return [spec.source] + manifest.module_sources(*modules, *spec.modules)
+
+#
+# Name of a unit's manifest entry, telemetry, and forced-rebuild tag
+#
+def target_name(spec, unit):
+    return spec.target(spec, unit) if spec.target else label(unit)
+
+def build_key(spec, inputs):
+    return manifest.build_key(inputs, {"version":spec.version, "settings":spec.settings}, sources(spec))
+
+#
+# Whether a unit would be rebuilt - only file sizes and times are looked at, no data are read
+#
+def is_stale(spec, unit):
+    target = target_name(spec, unit)
+    key = build_key(spec, spec.inputs(spec, unit))
+    return not manifest.is_current(spec.output_dir, target, key, force=manifest.forced(spec.product, target))
+
+#
+# One unit of work; returns the outputs written (or already up to date), relative to spec.output_dir
+#
+def build(spec, unit):
+    from atomic_prep import derived, telemetry
+    target = target_name(spec, unit)
+    inputs = spec.inputs(spec, unit)
+    key = build_key(spec, inputs)
+    if manifest.is_current(spec.output_dir, target, key, force=manifest.forced(spec.product, target)):
+        outputs = manifest.outputs(spec.output_dir, target)
+        print("Up to date " + ", ".join(outputs))
+        return outputs
+
+    with telemetry.Recorder(spec.product, target) as rec:
+        rec.stage("open")
+        source = spec.read(spec, inputs, unit, rec)
+        rec.stage("cf-fixup")
+        ds = cf_fixup(spec, source)
+        rec.stage("derive")
+        ds = derived.apply(ds, spec.to_kelvin, spec.derived)
+        if spec.derive is not None:
+            ds = spec.derive(spec, ds)
+        rec.stage("write")
+        ds.attrs = spec.global_attrs()
+        spec.output_dir.mkdir(parents=True, exist_ok=True)
+        if spec.write is not None:
+            outputs = [str(o) for o in spec.write(spec, ds, unit, rec)]
+        else:
+            fileName = spec.file_name(spec.file_date(spec, unit, ds) if spec.file_date else unit)
+            print("Writing " + fileName)
+            write(spec, ds, spec.output_dir.joinpath(fileName))
+            outputs = [fileName]
+        ds.close()
+        source.close()
+    manifest.record(spec.output_dir, target, key, outputs)
+    return outputs
+
+#
+# Add the outputs of the units built to the product's Zarr store
+#
+def _zarr_export(spec, results):
+    from atomic_prep import zarr_store
+    keys = {u:manifest.key(spec.output_dir, target_name(spec, u)) for u in results}
+    if spec.zarr_file is None:
+        zarr_store.update(spec.zarr_store,
+                          {re.search(r"_(20\d{6})_", outputs[0]).group(1):(spec.output_dir.joinpath(outputs[0]), keys[u])
+                           for u, outputs in results.items()})
+        return
+    # One file holds every flight: the store is rebuilt from it unless it came from the same build
+    import xarray as xr
+    for u, outputs in results.items():
+        index = zarr_store.read_index(spec.zarr_store)
+        if index and all(entry["key"] == keys[u] for entry in index.values()):
+            continue
+        print("Rebuilding " + spec.zarr_store.name)
+        with xr.open_dataset(spec.output_dir.joinpath(spec.zarr_file(spec, outputs))) as ds:
+            zarr_store.export_dataset(spec.zarr_store, ds, keys[u])
+
+#
+# All units (or those given), in parallel; returns results (the outputs of each unit) and failures
+#   as parallel.run does
+#   Every output is then checked for CF/OpenDAP compliance (atomic_prep.validate, report in the manifest
+#   directory) - units with any file with errors are counted as failures - and the rest are added to the
+#   product's Zarr store, one at a time
+#
+def run(spec, units=None, workers=None):
+    results, failures = parallel.run(functools.partial(build, spec), spec.units(spec) if units is None else units, workers)
+    if results:
+        from atomic_prep import validate
+        spec.output_dir.joinpath(manifest.manifest_dir).mkdir(parents=True, exist_ok=True)
+        report = spec.output_dir.joinpath(manifest.manifest_dir, "validation.json")
+        files = [(u, spec.output_dir.joinpath(f)) for u, outputs in results.items() for f in outputs]
+        checked = validate.run([f for u, f in files], report, workers=workers)
+        for (u, f), entry in zip(files, checked):
+            if entry["errors"] and u in results:
+                results.pop(u)
+                failures[u] = "{} fails validation, see {}".format(f.relative_to(spec.output_dir), report)
+                print("Failed: " + failures[u])
+    if spec.zarr_export and results:
+        _zarr_export(spec, results)
+    return results, failures
@@ -0,0 +1,86 @@
+#
+# Build manifest: skip rebuilding outputs whose inputs and settings haven't changed
+#   Each target (an output file, or a set of outputs made together) has an entry in
+#   <output directory>/.manifest/<target>.json holding a key and the outputs it produced.
+#   The key is a hash of the input files (size and modification time, or full contents),
+#   the settings that determine the output (data version, variable/name mappings...),
+#   and the source of the script and of the atomic_prep modules doing the work.
+#   Setting ATOMIC_PREP_FORCE to a comma-separated list of products and/or dates (YYYYMMDD),
+#   or to "all", forces those to be rebuilt.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import hashlib
+import importlib.util
+import json
+import os
+import pathlib
+
+manifest_dir = ".manifest"
+
+def _file_hash(f):
+    h = hashlib.sha256()
+    with open(f, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def input_signature(f, content=False):
+    f = pathlib.Path(f)
+    if content:
+        return [f.name, _file_hash(f)]
+    st = f.stat()
+    return [f.name, st.st_size, st.st_mtime_ns]
+
+#
+# Source files of modules (e.g. "atomic_prep.aoc"), found without importing them
+#
+def module_sources(*modules):
+    return [importlib.util.find_spec(m).origin for m in modules]
+
+# scripts: one source file or a list of them
+def build_key(inputs, settings, scripts, content=False):
+    if isinstance(scripts, (str, os.PathLike)):
+        scripts = [scripts]
+    description = {"inputs"  :[input_signature(f, content) for f in inputs],
+                   "settings":settings,
+                   "script"  :[_file_hash(s) for s in scripts]}
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+def forced(*tags):
+    requested = {t.strip() for t in os.environ.get("ATOMIC_PREP_FORCE", "").split(",") if t.strip()}
+    return "all" in requested or any(str(t) in requested for t in tags)
+
+def _entry(directory, target):
+    return pathlib.Path(directory).joinpath(manifest_dir, target + ".json")
+
+#
+# True if target was last built with this key and all of its outputs still exist
+#
+def is_current(directory, target, key, force=False):
+    entry = _entry(directory, target)
+    if force or not entry.exists():
+        return False
+    with open(entry) as fh:
+        recorded = json.load(fh)
+    return (recorded.get("key") == key and
+            all(pathlib.Path(directory).joinpath(o).exists() for o in recorded.get("outputs", [])))
+
+def outputs(directory, target):
+    with open(_entry(directory, target)) as fh:
+        return json.load(fh)["outputs"]
+
+def key(directory, target):
+    with open(_entry(directory, target)) as fh:
+        return json.load(fh)["key"]
+
+#
+# Entries are written atomically so that several worker processes can share a directory
+#
+def record(directory, target, key, outputs):
+    entry = _entry(directory, target)
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = entry.with_name(entry.name + ".{}.tmp".format(os.getpid()))
+    with open(tmp, "w") as fh:
+        json.dump({"key":key, "outputs":[str(o) for o in outputs]}, fh, indent=1)
+    os.replace(tmp, entry)
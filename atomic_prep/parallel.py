@@ -0,0 +1,50 @@
+#
+# Run independent per-flight or per-date units of work in a pool of worker processes
+#   A failure on one day is reported and the remaining days keep going
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+#
+# Number of worker processes: ATOMIC_PREP_WORKERS if set, otherwise one per CPU
+#
+def default_workers():
+    return int(os.environ.get("ATOMIC_PREP_WORKERS", os.cpu_count() or 1))
+
+def _label(item):
+    return getattr(item, "name", None) or str(item)
+
+#
+# Apply func to each item, with up to workers processes (workers = 1 runs serially in this process)
+#   Returns two dicts keyed by item: results for the items that succeeded and tracebacks for those that failed
+#
+def run(func, items, workers=None):
+    items    = list(items)
+    workers  = min(workers or default_workers(), max(len(items), 1))
+    results  = {}
+    failures = {}
+    if workers == 1:
+        for item in items:
+            try:
+                results[item] = func(item)
+            except Exception:
+                failures[item] = traceback.format_exc()
+                print("Failed: " + _label(item) + "\n" + failures[item])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(func, item):item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except Exception:
+                    failures[item] = traceback.format_exc()
+                    print("Failed: " + _label(item) + "\n" + failures[item])
+
+    print("{} of {} succeeded".format(len(results), len(items)))
+    if failures:
+        print("Failed: " + ", ".join(_label(i) for i in items if i in failures))
+    return results, failures
@@ -0,0 +1,88 @@
+#
+# Declarative description of an archive product
+#   A Product says where the inputs for each unit of work (flight, date, or file) are, how to read them,
+#   which variables to drop and rename, which units, standard names, and attributes to set,
+#   and how to name and encode the output. atomic_prep.engine turns a Product into files.
+#   Functions in a Product take the Product itself as their first argument and must be defined at module
+#   level (not lambdas), so that the Product can be sent to worker processes.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import dataclasses
+import pathlib
+import time
+from typing import Callable, Optional
+
+@dataclasses.dataclass
+class Product:
+    product    : str
+    version    : str
+    contact    : str
+    input_dir  : pathlib.Path
+    output_dir : pathlib.Path
+    # Units of work processed independently; inputs(spec, unit) -> list of files
+    units      : Callable
+    inputs     : Callable
+    # read(spec, inputs, unit, rec=None) -> xr.Dataset; rec (a telemetry.Recorder) can mark stages within the read
+    read       : Callable
+    # Source file of the spec - part of the build manifest key
+    source     : str
+    campaign   : str = "EUREC4A"
+    project    : str = "ATOMIC"
+    platform   : str = "P3"
+    # Global attribute naming the product, e.g. "product" or "instrument"
+    kind       : str = "product"
+    # CF fixups, applied in this order after reading
+    #   (to_kelvin is applied with derived, see atomic_prep.derived)
+    drop           : list = dataclasses.field(default_factory=list)
+    rename         : dict = dataclasses.field(default_factory=dict)
+    units_attrs    : dict = dataclasses.field(default_factory=dict)
+    to_kelvin      : list = dataclasses.field(default_factory=list)
+    standard_names : dict = dataclasses.field(default_factory=dict)
+    attrs          : dict = dataclasses.field(default_factory=dict)
+    delete_attrs   : dict = dataclasses.field(default_factory=dict)
+    # New variables {name:atomic_prep.derived.Derived}, computed from the variables as read
+    derived    : dict = dataclasses.field(default_factory=dict)
+    # derive(spec, ds) -> ds: anything else, after the fixups and derived variables
+    derive     : Optional[Callable] = None
+    # file_date(spec, unit, ds) -> date used in the file name; by default the unit is the date
+    file_date  : Optional[Callable] = None
+    # write(spec, ds, unit, rec) -> outputs, relative to output_dir, for products with more than one
+    #   output per unit (rec can mark stages within the write); by default ds is written to file_name
+    write      : Optional[Callable] = None
+    # target(spec, unit) -> name of the unit's build manifest entry (YYYYMMDD, so that rebuilds can be
+    #   forced by date); by default the unit's label (see atomic_prep.engine)
+    target     : Optional[Callable] = None
+    # Scaled-integer packing for atomic_prep.encoding
+    packing    : dict = dataclasses.field(default_factory=dict)
+    # Also add each output to a campaign-wide Zarr store (atomic_prep.zarr_store)
+    zarr_export : bool = True
+    # zarr_file(spec, outputs) -> the one output of a unit (e.g. a campaign-wide file) that is added to the
+    #   store, split by date; by default each unit's output is one flight
+    zarr_file   : Optional[Callable] = None
+    # Anything else that changes the output (mappings...) - part of the build manifest key
+    settings   : dict = dataclasses.field(default_factory=dict)
+    # atomic_prep modules the output depends on beyond those of the engine (engine.modules), e.g. "atomic_prep.aoc"
+    #   - their source is part of the build manifest key
+    modules    : list = dataclasses.field(default_factory=list)
+
+    @property
+    def file_prefix(self):
+        return "{}_{}_{}_{}".format(self.campaign, self.project, self.platform, self.product)
+
+    def file_name(self, date):
+        return self.file_prefix + f"{date:_%Y%m%d}" + "_" + self.version + ".nc"
+
+    @property
+    def zarr_store(self):
+        return self.output_dir.joinpath(self.file_prefix + "_" + self.version + ".zarr")
+
+    def global_attrs(self):
+        return {"creation_date":time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()),
+                "Conventions":"CF-1.7",
+                "campaign":self.campaign,
+                "project":self.project,
+                "platform":self.platform,
+                self.kind:self.product,
+                "contact":self.contact,
+                "version":self.version}
@@ -0,0 +1,3 @@
+#
+# Product specifications (atomic_prep.product.Product), one module per product
+#
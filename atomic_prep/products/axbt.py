@@ -0,0 +1,141 @@
+#
+# Chris Fairall assembled Matlib files containing QC'd profiles from the AXBTs dropped by the P3 during ATOMIC
+# Gijs de Boer translated these into netcdf
+#   All AXBTs are read together and written as one Level-2 file per profile and a Level-3A file
+#   on a common depth grid (following the treatment of the dropsondes, JOANNE): one unit of work with
+#   many outputs, written by write() below and built by atomic_prep.engine
+#
+import pathlib
+
+from atomic_prep import engine
+from atomic_prep.product import Product
+
+def units(spec):
+    return ["campaign"]
+
+def inputs(spec, unit):
+    return sorted(spec.input_dir.glob("*.cdf"))
+
+def read(spec, inputs, unit, rec=None):
+    import xarray as xr
+    return xr.open_mfdataset(inputs, combine='by_coords')
+
+#
+# Temperature C -> K only if it's in C, and a unique AXBT ID of the form P3-MMDD_aNNN
+#
+def derive(spec, ds):
+    import xarray as xr
+    if ds.temperature.attrs["units"] == "C":
+        ds.temperature.attrs["units"] = "K"
+        ds["temperature"] += 273.15
+    ds["axbt_id"] = xr.DataArray(["P3-{:02d}{:02d}_a{:03d}".format(ds.time[i].dt.month.values, ds.time[i].dt.day.values, i+1)
+                                  for i in range(len(ds.time))], dims = ["time"])
+    return ds
+
+def file_prefix(spec):
+    return "{}_{}".format(spec.platform, spec.product)
+
+def level_3_file(spec):
+    return pathlib.Path("Level_3", file_prefix(spec) + "_Level_3_" + spec.version + ".nc")
+
+#
+# Level-2 files contain one profile of temperature vs depth with no missing values
+# Level-3A file contains all AXBTs from the project interpolated onto a uniform vertical grid
+#   Returns the outputs, relative to spec.output_dir
+#
+def write(spec, ds, unit, rec):
+    import numpy  as np
+    import xarray as xr
+    from atomic_prep import profiles
+
+    outputs = []
+    #
+    # Level 2:Each profile has its own length, stripping out missing values
+    #
+    L2 = []
+    for i in range(ds.time.size):
+        out = ds.isel(time=i).swap_dims({"sample":"depth"}).reset_coords().dropna(dim="depth", subset=["temperature", "depth"], how="any")
+        for v in ["depth", "time"] :
+            out[v].attrs = ds[v].attrs
+        out["time"].attrs["standard_name"] = "time"
+        L2.append(out)
+
+    #
+    # Write out Level-2 files
+    #
+    rec.stage("write-level-2")
+    L2_dir = spec.output_dir.joinpath("Level_2")
+    L2_dir.mkdir(parents=True, exist_ok=True)
+    print("Level 2 files:")
+    for out in L2:
+        datetime = out.time.dt
+        fileName  = file_prefix(spec) + "_{:04d}{:02d}{:02d}".format(datetime.year.values, datetime.month.values,  datetime.day.values)
+        fileName += "_{:02d}{:02d}{:02d}_{}.nc".format(datetime.hour.values, datetime.minute.values, datetime.second.values, spec.version)
+        print("  " + fileName)
+        outputs.append(pathlib.Path("Level_2", fileName))
+        engine.write(spec, out, L2_dir.joinpath(fileName))
+        out.close()
+
+    #
+    # Level 3A:
+    # Interpolate onto .1 m depth spacing to 1 km.
+    #   Depth-dependent variables are interpolated in batches of profiles and streamed to the file;
+    #   everything else (launch time, position, ID) is written first
+    #
+    rec.stage("interpolate-write-level-3")
+    depth = np.arange(0, 1000., .1)
+    profile_vars = [v for v in L2[0].data_vars if "depth" in L2[0][v].dims]
+    L3 = xr.concat([i.drop_dims("depth") for i in L2], dim="time")
+    L3 = L3.assign_coords(depth=depth)
+    for v in ["depth", "time"] :
+        L3[v].attrs = ds[v].attrs
+    L3["time"].attrs["standard_name"] = "time"
+    L3.attrs = ds.attrs
+
+    #
+    # Level 3A file
+    #
+    fileName = level_3_file(spec)
+    spec.output_dir.joinpath(fileName.parent).mkdir(parents=True, exist_ok=True)
+    print("Level 3 file:", fileName.name)
+    engine.write(spec, L3, spec.output_dir.joinpath(fileName))
+    for v in profile_vars:
+        profiles.write_interpolated(spec.output_dir.joinpath(fileName), v, ds[v].attrs, "depth", depth,
+                                    [i.depth.values for i in L2], [i[v].values for i in L2])
+    L3.close()
+    outputs.append(fileName)
+    return outputs
+
+# The campaign-wide Zarr store holds the Level-3 profiles, indexed by launch date
+def zarr_file(spec, outputs):
+    return level_3_file(spec)
+
+dataDir = pathlib.Path("data/AXBT")
+spec = Product(product    = "AXBT",
+               kind       = "instrument",
+               version    = "v0.7",
+               contact    = "Chris Fairall <Chris.Fairall@noaa.gov>",
+               input_dir  = dataDir.joinpath("Fairall_Level_1"),
+               output_dir = dataDir,
+               units      = units,
+               inputs     = inputs,
+               read       = read,
+               source     = __file__,
+               #
+               # A little more compliance with CF: lat/lon names, units
+               #   (temperature is converted C -> K only if it's in C)
+               #
+               drop       = ["base_time", "time_offset"],
+               rename     = {"T":"temperature"},
+               units_attrs    = {"lon":"degrees_east",
+                                 "lat":"degrees_north"},
+               standard_names = {"lon":"longitude",
+                                 "lat":"latitude",
+                                 "time":"time",
+                                 "depth":"depth",
+                                 "temperature":"sea_water_temperature"},
+               attrs      = {"time":{"description":"AXBT launch time and date"}},
+               derive     = derive,
+               write      = write,
+               zarr_file  = zarr_file,
+               modules    = ["atomic_prep.profiles"])
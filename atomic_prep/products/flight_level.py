@@ -0,0 +1,136 @@
+#
+# Selected data sets from the large file with flight level data provided by NOAA/AOC
+#   Reproduce calculations done by Chris Fairall <Chris.Fairall@noaa.gov> for the ATOMIC
+#   field program
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import datetime
+import pathlib
+
+from atomic_prep.derived import Derived, qair3, radar_pitch
+from atomic_prep.product import Product
+
+flight_dates = [datetime.date(2020, 1, 17),
+                datetime.date(2020, 1, 19),
+                datetime.date(2020, 1, 23),
+                datetime.date(2020, 1, 24),
+                datetime.date(2020, 1, 31),
+                datetime.date(2020, 2,  3),
+                datetime.date(2020, 2,  4),
+                datetime.date(2020, 2,  5),
+                datetime.date(2020, 2,  9),
+                datetime.date(2020, 2, 10),
+                datetime.date(2020, 2, 11)]
+
+#
+# Mapping between variables in the summary and the file provided by AOC
+#
+var_mapping = {
+    "lat":"LATref", # Also in Fairall/de Boer summary file
+    "lon":"LONref", #
+    "alt":"ALTref", #
+    "pitch":"PITCHref", #
+    "roll":"ROLLref", #
+    "cog":"TRK.d",
+    "ws":"WS.d",
+    "wd":"WD.d",
+    "U10_sfmr":"SfmrWS.1",
+    "RainRate_sfmr":"SfmrRainRate.1",
+    "gs":"GS.d",
+    "hed":"THDGref",
+    "tas":"TAS.d", #
+    "press":"PS.c", #
+    "Td":"TD.c",
+    "Ta":"TA.d",
+    "RH":"HUM_REL.d",
+    "TIR_down":"TRadD.1",
+    "TIR_side":"TRadS.1",
+    "TIR_up"  :"TRadU.1",
+    "cab":"PCAB.1",
+    "wvel":"UWZ.d",
+    "uvel":"UWX.d",
+    "vvel":"UWY.d"
+}
+
+#
+# CF standard names, where sensible
+#
+name_mapping = {
+    "time":"time",
+    "lon":"longitude",
+    "lat":"latitude",
+    "ws":"wind_speed",
+    "wd":"wind_to_direction",
+    "Td":"dew_point_temperature",
+    "Ta":"air_temperature",
+    "RH":"relative_humidity"}
+
+def units(spec):
+    return flight_dates
+
+#
+# AOC Level-1 files are named *AC.nc or, for some flights, *AXC.nc
+#
+def inputs(spec, d):
+    aoc_file_name = spec.input_dir.joinpath(f"{d:%Y%m%d}" + "I1_")
+    for suffix in ["AC.nc", "AXC.nc"]:
+        f = pathlib.Path(aoc_file_name.as_posix() + suffix)
+        if f.exists():
+            return [f]
+    raise FileNotFoundError("No AOC Level-1 file {}AC.nc or {}AXC.nc".format(aoc_file_name, aoc_file_name))
+
+#
+# Time index and the mapped variables, restricted to samples with valid times
+#   Hours, mins, secs are in UTC time
+#   File names are consistent with this - night flight were 8/9, 9/10, 10/11 local time
+#   Would have been great to do this over OpenDAP but some variables (e.g. TRK.d) can't be read??
+#
+def read(spec, inputs, d, rec=None):
+    from atomic_prep import aoc
+    full = aoc.open_level1(inputs[0])
+    subset = aoc.extract(full, d, var_mapping, rec)
+    full.close()
+    return subset
+
+def derive(spec, subset):
+    # Replace the units to be consistent with remote sensing files which use hPa
+    if subset.press.attrs.get("units") == "mb":
+         subset.press.attrs["units"] = "hPa"
+    return subset
+
+dataDir = pathlib.Path("data/flight-level-summary")
+spec = Product(product    = "Flight-Level",
+               version    = "v1.1",
+               contact    = "Chris Fairall <Chris.Fairall@noaa.gov>",
+               input_dir  = dataDir.joinpath("Level_1"),
+               output_dir = dataDir.joinpath("Level_2"),
+               units      = units,
+               inputs     = inputs,
+               read       = read,
+               source     = __file__,
+               units_attrs    = {**{v:"degrees" for v in ["pitch", "roll", "cog", "wd", "hed"]},
+                                 "lat":"degrees_north",
+                                 "lon":"degrees_east"},
+               to_kelvin      = ["Td", "Ta"],
+               standard_names = name_mapping,
+               #
+               # Pitch used for radar calculations, and mixing ratio (from temperature in C)
+               #
+               derived    = {"pitchradar":Derived(radar_pitch, ["pitch"],
+                                                  {"units":"degrees",
+                                                   "details":"1.1 degrees subtracted from pitch to align with W-band radar"}),
+                             "qair":Derived(qair3, ["press", "Ta", "RH"],
+                                            {"units":"g kg-1",
+                                             "long_name":"water vapor mixing ratio",
+                                             "standard_name":"humidity_mixing_ratio"})},
+               derive     = derive,
+               #
+               # Variables stored as scaled 16-bit integers - resolution well below instrument precision
+               #   (scale_factor, add_offset, type on disk); other floats are written as float32 except lat/lon
+               #
+               packing    = {"Ta":(0.01, 273.15, "int16"),
+                             "Td":(0.01, 273.15, "int16"),
+                             "RH":(0.01, 0.,     "int16")},
+               settings   = {"var_mapping":var_mapping, "name_mapping":name_mapping},
+               modules    = ["atomic_prep.aoc"])
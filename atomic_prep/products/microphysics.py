@@ -0,0 +1,76 @@
+#
+# Combine five microphysics files from Mason Leandro at UCSD,
+#   two containing best-estimate size distributions and three
+#   containing measurements from individual instruments, to
+#   produce a single file
+#
+import datetime
+import pathlib
+
+from atomic_prep.product import Product
+
+acronyms = {"CAS":"Cloud and Aerosol Spectrometer",
+            "CIP":"Cloud Imaging Probe",
+            "PIP":"Precipitation Imaging Probe"}
+synthesized = ["hydrometeor", "aerosol"]
+
+dates = [datetime.date(2020, 1, 31),
+         datetime.date(2020, 2,  3),
+         datetime.date(2020, 2,  4),
+         datetime.date(2020, 2,  5),
+         datetime.date(2020, 2,  9),
+         datetime.date(2020, 2, 10)]
+
+# Samples along time read at once from each input
+time_chunk = 3600
+
+def units(spec):
+    return dates
+
+def inputs(spec, d):
+    return [spec.input_dir.joinpath(l + f"{d:_%Y%m%d}" + ".nc") for l in synthesized + list(acronyms.keys())]
+
+#
+# Files are opened lazily, in chunks along time; renames and attributes only touch metadata,
+#   and the single merge is aligned lazily, so data are read chunk by chunk as the file is written
+#
+def read(spec, inputs, d, rec=None):
+    import xarray as xr
+    renamed = [["number_concentration", "effective_radius"]] * len(synthesized) + \
+              [["number_concentration", "size", "size_bnds"]] * len(acronyms)
+    parts = [xr.open_dataset(f, chunks={"time":time_chunk}) for f in inputs]
+    combo = xr.merge([p.rename({v:l + "_" + v for v in names})
+                      for p, l, names in zip(parts, synthesized + list(acronyms.keys()), renamed)],
+                     compat="override")
+    combo.set_close(lambda: [p.close() for p in parts])
+    return combo
+
+attrs = {}
+for l in synthesized:
+    attrs[l + "_number_concentration"] = {"long_name":"number_concentration_" + l}
+    attrs[l + "_effective_radius"]     = {"long_name":"effective_radius_"     + l}
+    attrs[l + "_size_bnds"]            = {"long_name":"size_bin_boundaries_"  + l}
+    attrs[l + "_size"]                 = {"long_name":"size_bin_midpoints_"  + l}
+for l in acronyms.keys():
+    attrs[l + "_size"] = \
+      {"description":"Bin-mean sizes measured by "                     + acronyms[l] + " (" + l + ")",
+       "long_name"  :"bin_midpoints_"        + l}
+    attrs[l + "_size_bnds"] = \
+      {"description":"Bin size boundaries measured by "                + acronyms[l] + " (" + l + ")",
+       "long_name"  :"bin_boundaries_"       + l}
+    attrs[l + "_number_concentration"] = \
+      {"description":"Size-resolved number concentration measured by " + acronyms[l] + " (" + l + ")",
+       "long_name"  :"number_concentration_" + l}
+
+dataDir = pathlib.Path("data/ATOMIC_microphysics_nc_files")
+spec = Product(product    = "microphysics",
+               version    = "v1.0",
+               contact    = "Mason Leandro <masonleandro@ucsc.edu>",
+               input_dir  = dataDir,
+               output_dir = dataDir,
+               units      = units,
+               inputs     = inputs,
+               read       = read,
+               source     = __file__,
+               attrs      = attrs,
+               settings   = {"acronyms":acronyms})
@@ -0,0 +1,74 @@
+#
+# Chris Fairall assembled Matlib files containing cloud parameters, radar parameters, and windspeed estimates
+#    as measureed by the P3 during ATOMIC
+# Gijs de Boer translated these into netcdf
+# Archive compatible Level-3 files, one per flight
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import datetime
+import pathlib
+import re
+
+from atomic_prep.product import Product
+
+def to_datetime(dt64):
+    import numpy as np
+    epoch = np.datetime64("1970-01-01")
+    second = np.timedelta64(1, "s")
+    return datetime.datetime.utcfromtimestamp((dt64 - epoch) / second)
+
+name_mapping = {
+    "time":"time",
+    "lon":"longitude",
+    "lat":"latitude"}
+
+def units(spec):
+    return sorted(spec.input_dir.glob("*.cdf"))
+
+def inputs(spec, f):
+    return [f]
+
+def read(spec, inputs, f, rec=None):
+    import xarray as xr
+    return xr.open_dataset(inputs[0])
+
+def file_date(spec, f, ds):
+    return to_datetime(ds.time.values[0])
+
+#
+# Files are keyed by the date in their names (YYYYMMDD, as in catalog.files_by_date), so that a rebuild
+#   can be forced by date and listing the units needn't open any file
+#
+def target(spec, f):
+    match = re.search(r"(20\d{6})", f.name)
+    return match.group(1) if match else f.stem
+
+dataDir = pathlib.Path("data/remote-sensing")
+spec = Product(product    = "Remote-sensing",
+               version    = "v1.1",
+               contact    = "Chris Fairall <Chris.Fairall@noaa.gov>",
+               input_dir  = dataDir.joinpath("Level_3pre"),
+               output_dir = dataDir.joinpath("Level_3"),
+               units      = units,
+               inputs     = inputs,
+               read       = read,
+               source     = __file__,
+               drop       = ["base_time", "time_offset", "sst_raw", "U10_SMFR"],
+               rename     = {"p":"press",
+                             "sst_IR":"SST_IR_est",
+                             "Rain_Rate":"RainRate_Wband",
+                             "U10_SMFR_Corr":"U10_sfmr_corr"},
+               #
+               # A little more compliance with CF: names of lat/lon units, temperature C -> K
+               #
+               units_attrs    = {"lon":"degrees_east",
+                                 "lat":"degrees_north",
+                                 **{v:"1"       for v in ["cind_radar", "cind_IR", "MSS_Radar"]},
+                                 **{v:"degrees" for v in ["pitch", "roll"]}},
+               to_kelvin      = ["SST_IR_est", "T_IR_CT", "T_Air_CT"],
+               standard_names = name_mapping,
+               attrs          = {"SST_IR_est":{"description":"estimated clear-sky downward IR temperature"}},
+               delete_attrs   = {"time":["description"]},
+               file_date  = file_date,
+               target     = target,
+               settings   = {"name_mapping":name_mapping})
@@ -0,0 +1,46 @@
+#
+# WSRA Level-4 files provided by Prosensing: attributes added, made OpenDAP compliant, and renamed
+#   in place (atomic_prep.attributes) - there's no engine build, since the files are patched, not rewritten
+#   - fill values the same type as the variables themselves (cast by attributes.patch)
+#   - no unsigned ints
+#
+import pathlib
+
+wsra_version = "v1.0"
+dataDir = pathlib.Path("data/WSRA")
+
+global_attrs = {"platform":"P3",
+                "campaign":"EUREC4A",
+                "project":"ATOMIC",
+                "contact":"Ivan Popstefanija <popstefanija@prosensing.com>",
+                "instrument":"WSRA",
+                "version":wsra_version}
+
+fill_variables = ["dominant_to_secondary_partition_angle",
+                  "dominant_wave_direction",
+                  "dominant_wave_height",
+                  "dominant_wave_wavelength",
+                  "peak_spectral_variance",
+                  "wsra_computed_roll",
+                  "rainfall_rate",
+                  "rainfall_rate_median",
+                  "sea_surface_mean_square_slope",
+                  "sea_surface_mean_square_slope_median",
+                  "sea_surface_wave_significant_height",
+                  "secondary_wave_direction",
+                  "secondary_wave_height",
+                  "secondary_wave_wavelength",
+                  "swh_correction_ratio"]
+
+def files(directory=dataDir):
+    return sorted(pathlib.Path(directory).glob("*.nc"))
+
+def patch(f):
+    from atomic_prep import attributes
+    new = attributes.patch(f,
+                           global_attrs   = global_attrs,
+                           variable_attrs = {v:{"missing_value":-999.} for v in fill_variables},
+                           casts          = {"time":"int32", "trajectory":"int32"},
+                           rename         = (r"WSRA-L4-(.*)I\.nc", r"EUREC4A_ATOMIC_P3_WSRA_\1_" + wsra_version + ".nc"))
+    print(new)
+    return new
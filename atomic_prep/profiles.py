@@ -0,0 +1,60 @@
+#
+# Interpolate many ragged profiles (e.g. AXBTs) onto a common vertical grid and stream the result to netCDF
+#   All profiles in a batch are interpolated with a single call to np.interp by offsetting each
+#   profile's coordinate into its own band so that the concatenated coordinate is monotonic.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import numpy   as np
+import netCDF4
+
+#
+# Interpolate profiles (values[i] as a function of coords[i]; lists of 1-D arrays of varying length)
+#   onto grid. Returns an array of shape (len(coords), len(grid)), NaN outside the range of each profile
+#   (as xarray's interp does). Profiles need not be sorted.
+#
+def interp_ragged(grid, coords, values):
+    grid    = np.asarray(grid, dtype=np.float64)
+    lengths = np.array([len(c) for c in coords])
+    out     = np.full((lengths.size, grid.size), np.nan)
+    if lengths.sum() == 0 or grid.size == 0:
+        return out
+
+    x = np.concatenate([np.asarray(c, dtype=np.float64) for c in coords])
+    y = np.concatenate([np.asarray(v, dtype=np.float64) for v in values])
+    profile = np.repeat(np.arange(lengths.size), lengths)
+    order = np.lexsort((x, profile))
+    x, y, profile = x[order], y[order], profile[order]
+
+    # Each profile is shifted into a band wider than the span of all coordinates and the grid
+    lo   = min(x.min(), grid.min())
+    band = max(x.max(), grid.max()) - lo + 1.
+    xx   = (x - lo) + profile * band
+    targets = (grid - lo)[np.newaxis, :] + (np.arange(lengths.size) * band)[:, np.newaxis]
+
+    nonempty = lengths > 0
+    out[nonempty] = np.interp(targets[nonempty], xx, y)
+    # Profile end points, to mask grid points outside each profile
+    ends  = np.cumsum(lengths)
+    first = np.full(lengths.size, np.inf)
+    last  = np.full(lengths.size, -np.inf)
+    first[nonempty] = x[(ends - lengths)[nonempty]]
+    last [nonempty] = x[ends[nonempty] - 1]
+    out[(grid[np.newaxis, :] < first[:, np.newaxis]) | (grid[np.newaxis, :] > last[:, np.newaxis])] = np.nan
+    return out
+
+#
+# Add variable name(time, grid_dim) to an existing netCDF file (which already has both dimensions),
+#   interpolating chunk profiles at a time so memory use doesn't grow with the number of profiles
+#
+def write_interpolated(path, name, attrs, grid_dim, grid, coords, values,
+                       chunk=256, dtype="f4", complevel=4):
+    with netCDF4.Dataset(path, "a") as nc:
+        var = nc.createVariable(name, dtype, ("time", grid_dim),
+                                zlib=True, complevel=complevel, shuffle=True,
+                                chunksizes=(min(chunk, max(len(coords), 1)), len(grid)),
+                                fill_value=np.nan)
+        var.setncatts({k:v for k, v in attrs.items() if k != "_FillValue"})
+        for start in range(0, len(coords), chunk):
+            stop = min(start + chunk, len(coords))
+            var[start:stop, :] = interp_ragged(grid, coords[start:stop], values[start:stop])
@@ -0,0 +1,102 @@
+#
+# Quicklook plots for QC
+#   Pages are drawn and rendered to PDF in parallel worker processes (with the non-interactive Agg
+#   backend); only the rendered bytes come back, to be joined, in order, into multi-page PDFs with pypdf.
+#   Pages of several PDFs share one pool. Without pypdf, pages are drawn one at a time.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.collections import LineCollection
+import numpy as np
+import xarray as xr
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+from atomic_prep import parallel
+from atomic_prep.catalog import files_by_date
+
+# One page as PDF bytes
+def _render(make_page, item):
+    fig = make_page(item)
+    page = io.BytesIO()
+    fig.savefig(page, format="pdf")
+    plt.close(fig)
+    return page.getvalue()
+
+#
+# documents = {path:(make_page, items)}; make_page(item) returns a matplotlib figure, one page per item
+#
+def write_pdfs(documents, workers=None):
+    jobs = [(path, make_page, item) for path, (make_page, items) in documents.items() for item in items]
+    workers = min(workers or parallel.default_workers(), max(len(jobs), 1))
+    if workers == 1 or PdfWriter is None:
+        for path, (make_page, items) in documents.items():
+            with PdfPages(path) as pdf:
+                for item in items:
+                    fig = make_page(item)
+                    pdf.savefig(fig)
+                    plt.close(fig)
+        return
+
+    writers = {path:PdfWriter() for path in documents}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pages = pool.map(_render, [make_page for path, make_page, item in jobs], [item for path, make_page, item in jobs])
+        for (path, make_page, item), page in zip(jobs, pages):
+            writers[path].append(io.BytesIO(page))
+    for path, writer in writers.items():
+        with open(path, "wb") as fh:
+            writer.write(fh)
+
+def write_pdf(path, make_page, items, workers=None):
+    write_pdfs({path:(make_page, items)}, workers)
+
+#
+# Many profiles (x, y pairs of 1-D arrays, possibly of different lengths) drawn as a single artist
+#
+def plot_profiles(ax, profiles, **kwargs):
+    segments = [np.column_stack([np.asarray(x), np.asarray(y)]) for x, y in profiles]
+    lines = LineCollection(segments, **kwargs)
+    ax.add_collection(lines)
+    ax.autoscale()
+    return lines
+
+#
+# One page per date with both flight-level and cloud files - only altitude is read
+#   item is (date, flight-level file, cloud file)
+#
+def coverage_page(item):
+    date, fl_file, cl_file = item
+    with xr.open_dataset(fl_file) as fl, xr.open_dataset(cl_file) as cl:
+        fig = plt.figure()
+        plt.plot(fl.time, fl.alt.values)
+        plt.plot(cl.time, cl.alt.values)
+    plt.title(date)
+    return fig
+
+#
+# All profiles in a set of files on one page, drawn as a single collection; only temperature and depth are read
+#
+def profile_page(files, title):
+    profiles = []
+    for f in files:
+        with xr.open_dataset(f) as ds:
+            depth = ds.depth.values
+            temperature = ds.temperature.transpose(..., "depth").values.reshape(-1, depth.size)
+        profiles += [(t, depth) for t in temperature]
+    fig, ax = plt.subplots()
+    plot_profiles(ax, profiles, linewidths=0.5, colors=[c["color"] for c in plt.rcParams["axes.prop_cycle"]])
+    ax.set_xlabel("Temperature (K)")
+    ax.set_ylabel("Depth (m)")
+    ax.invert_yaxis()
+    ax.set_title(title)
+    return fig
@@ -0,0 +1,123 @@
+#
+# Read data over OpenDAP (e.g. from the AERIS THREDDS server)
+#   - authenticated sessions are pooled and reused across granules
+#   - variable and index subsets are sent to the server as DAP constraints, so only those values are transferred
+#   - fetched subsets are kept in an on-disk cache (least-recently-used blocks are evicted
+#     beyond a size limit), so repeated analysis runs don't download the same data again.
+#     The cache may be shared by threads and processes: blocks are written under a temporary name and
+#     renamed into place, and a block removed by another evictor is just a cache miss
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import xarray as xr
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+cache_dir       = pathlib.Path(os.environ.get("ATOMIC_PREP_CACHE", pathlib.Path.home().joinpath(".cache", "atomic-prep")))
+cache_max_bytes = int(os.environ.get("ATOMIC_PREP_CACHE_BYTES", 10 * 2**30))
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+#
+# One session per set of credentials, with a connection pool large enough for concurrent fetches
+#
+def session(auth=None, pool_size=16):
+    with _sessions_lock:
+        if auth not in _sessions:
+            s = requests.Session()
+            s.auth = auth
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                  max_retries=Retry(total=3, backoff_factor=0.5,
+                                                    status_forcelist=[500, 502, 503, 504]))
+            s.mount("http://",  adapter)
+            s.mount("https://", adapter)
+            _sessions[auth] = s
+        return _sessions[auth]
+
+#
+# pydap 3.5 and later make a session of their own for each request, keeping only bearer tokens from the
+#   one they're given, so (user, password) credentials also go in the URL, where requests finds them
+#
+def _with_credentials(url, auth):
+    if auth is None:
+        return url
+    parts  = urllib.parse.urlsplit(url)
+    netloc = "{}:{}@{}".format(urllib.parse.quote(auth[0], safe=""), urllib.parse.quote(auth[1], safe=""),
+                               parts.netloc.rpartition("@")[2])
+    return urllib.parse.urlunsplit(parts._replace(netloc=netloc))
+
+#
+# Lazily opened remote dataset - nothing but metadata is transferred until values are used
+#
+def open_remote(url, auth=None):
+    return xr.open_dataset(xr.backends.PydapDataStore.open(_with_credentials(url, auth), session=session(auth)))
+
+def _index(i):
+    if isinstance(i, slice):
+        return [i.start, i.stop, i.step]
+    if isinstance(i, int):
+        return i
+    return [int(j) for j in i]
+
+def _cache_file(url, variables, isel):
+    key = json.dumps({"url":url,
+                      "variables":sorted(variables) if variables else None,
+                      "isel":{d:_index(i) for d, i in (isel or {}).items()}},
+                     sort_keys=True)
+    return cache_dir.joinpath(hashlib.sha256(key.encode()).hexdigest() + ".nc")
+
+def _evict():
+    blocks = []
+    for f in cache_dir.glob("*.nc"):
+        try:
+            st = f.stat()
+        except FileNotFoundError:
+            continue
+        blocks.append((st.st_mtime, st.st_size, f))
+    blocks.sort(key=lambda b: b[0])
+    total = sum(size for mtime, size, f in blocks)
+    for mtime, size, f in blocks:
+        if total <= cache_max_bytes:
+            break
+        total -= size
+        f.unlink(missing_ok=True)
+
+#
+# Values of variables (all if None) at isel = {dimension:int, slice, or list of ints}, from the cache if possible
+#
+def fetch(url, variables=None, isel=None, auth=None, cache=True):
+    block = _cache_file(url, variables, isel)
+    if cache:
+        try:
+            os.utime(block)
+            with xr.open_dataset(block) as ds:
+                return ds.load()
+        except FileNotFoundError:
+            pass
+
+    with open_remote(url, auth) as ds:
+        subset = (ds[variables] if variables else ds).isel(isel or {}).load()
+    if cache:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = block.with_name(block.name + ".{}.{}.tmp".format(os.getpid(), threading.get_ident()))
+        subset.to_netcdf(tmp)
+        os.replace(tmp, block)
+        _evict()
+    return subset
+
+#
+# The same subset from many granules, fetched concurrently over the pooled session; results are in the order of urls
+#
+def fetch_many(urls, variables=None, isel=None, auth=None, cache=True, workers=8):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda u: fetch(u, variables, isel, auth, cache), urls))
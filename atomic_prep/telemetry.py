@@ -0,0 +1,145 @@
+#
+# Per-stage telemetry for the reformatting scripts
+#   For each unit of work (a flight, date, or file) and each stage within it (open, extract, cf-fixup, write...)
+#   records wall and CPU time, bytes read and written, and resident memory as one JSON line in
+#   ATOMIC_PREP_LOG (default atomic-prep-log.jsonl). Lines are short single appends, so
+#   worker processes can share the log.
+#   Memory is the resident set at the end of each stage and its peak during the stage (on Linux the
+#   process's peak is reset at the start of each stage, so units run one after another in a reused worker
+#   don't inherit each other's peaks); process_max_rss_mb is the high-water mark of the whole process.
+#   Used as a context manager, a unit that fails is still recorded, with the error.
+#   Setting ATOMIC_PREP_PROFILE to a unit (e.g. 20200205) profiles that unit with cProfile;
+#   ATOMIC_PREP_PYSPY does the same with py-spy, if installed. Output goes to <product>_<unit>.prof/.svg
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import cProfile
+import json
+import os
+import resource
+import signal
+import subprocess
+import time
+
+# Read each time a record is written, so the log can be redirected after import
+def log_file():
+    return os.environ.get("ATOMIC_PREP_LOG", "atomic-prep-log.jsonl")
+
+#
+# Bytes passed to read and write system calls so far (from /proc on Linux; None elsewhere)
+#
+def _io():
+    try:
+        with open("/proc/self/io") as fh:
+            counters = dict(line.split(":") for line in fh)
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def _process_max_rss_mb():
+    # ru_maxrss is in kB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if os.uname().sysname == "Darwin" else rss / 2**10
+
+#
+# Current and peak resident memory (MB) from /proc (None elsewhere); the peak is since the last _reset_peak()
+#
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as fh:
+            status = dict(line.split(":", 1) for line in fh)
+        return int(status["VmRSS"].split()[0]) / 2**10, int(status["VmHWM"].split()[0]) / 2**10
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def _reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+class _Counters:
+    def __init__(self):
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        self.read, self.written = _io()
+        self.peak_reset = _reset_peak()
+
+    def since(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        read, written = _io()
+        rss, peak = _rss_mb()
+        return {"wall_s"       :wall - self.wall,
+                "cpu_s"        :cpu  - self.cpu,
+                "bytes_read"   :None if self.read    is None else read    - self.read,
+                "bytes_written":None if self.written is None else written - self.written,
+                "rss_mb"       :rss,
+                "peak_rss_mb"  :peak if self.peak_reset else None,
+                "process_max_rss_mb":_process_max_rss_mb()}
+
+#
+# Records a sequence of stages for one unit of work:
+#   rec = Recorder(product, unit); rec.stage("open"); ...; rec.stage("write"); ...; rec.close()
+#   Each call to stage() ends the previous stage; close() ends the last one and records the unit total
+#   or, equivalently, with Recorder(product, unit) as rec: ..., which also records a unit that raises
+#
+class Recorder:
+    def __init__(self, product, unit):
+        self.product, self.unit = product, str(unit)
+        self.current = None
+        self.peak    = None
+        self.total   = _Counters()
+        self.profile = None
+        self.pyspy   = None
+        if os.environ.get("ATOMIC_PREP_PROFILE") == self.unit:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        if os.environ.get("ATOMIC_PREP_PYSPY") == self.unit:
+            try:
+                self.pyspy = subprocess.Popen(["py-spy", "record", "-p", str(os.getpid()),
+                                               "-o", self._output(".svg")])
+            except OSError:
+                print("py-spy isn't available; not profiling " + self.unit)
+
+    def _output(self, suffix):
+        return "{}_{}{}".format(self.product, self.unit, suffix)
+
+    def _write(self, stage, counters, **extra):
+        record = {"time":time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                  "product":self.product, "unit":self.unit, "stage":stage, "pid":os.getpid()}
+        record.update(counters.since())
+        record.update(extra)
+        with open(log_file(), "a") as fh:
+            fh.write(json.dumps(record) + "\n")
+        return record
+
+    def stage(self, name):
+        if self.current is not None:
+            peak = self._write(*self.current)["peak_rss_mb"]
+            if peak is not None:
+                self.peak = max(peak, self.peak or 0.)
+        self.current = (name, _Counters())
+
+    # error: the exception that ended the unit, if any
+    def close(self, error=None):
+        self.stage(None)
+        self.current = None
+        # The process peak was reset by each stage, so the unit's peak is the largest of the stages'
+        extra = {"peak_rss_mb":self.peak} if self.total.peak_reset else {}
+        if error is not None:
+            extra.update({"failed":True, "error":repr(error)})
+        self._write("total", self.total, **extra)
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self._output(".prof"))
+        if self.pyspy is not None:
+            self.pyspy.send_signal(signal.SIGINT)
+            self.pyspy.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        self.close(error)
+        return False
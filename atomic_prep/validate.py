@@ -0,0 +1,202 @@
+#
+# CF / OpenDAP compliance checks for files as written, reading only the headers (no data are loaded)
+#   - missing_value, valid_min/max/range, and _FillValue of the same type as the variable
+#   - no unsigned integer types, which OpenDAP servers reject
+#   - units on numeric data variables, spelled the way UDUNITS understands them (e.g. hPa not mb),
+#     and well-formed standard names; latitude, longitude and time with their CF names and units
+#   - time coordinates encoded as numbers with "<units> since <date>" and a known calendar
+#   - required global attributes
+#   Each problem is an "error" (the file shouldn't be published) or a "warning". Problems that can be
+#   fixed from the header alone are fixed, if asked, in the same pass with atomic_prep.attributes.patch
+#   Files are checked in parallel and the results written as a JSON report.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import functools
+import json
+import re
+
+import numpy   as np
+import netCDF4
+
+from atomic_prep import attributes, parallel
+
+required_global = ["Conventions", "campaign", "project", "platform", "contact", "version"]
+
+# Attributes that must have the variable's own type
+typed_attrs = attributes.typed_attrs
+
+# Spellings of units that UDUNITS doesn't accept (or reads as something else: C is coulomb)
+unit_spellings = {"mb":"hPa", "mbar":"hPa", "millibar":"hPa",
+                  "C":"degC", "deg C":"degC", "deg_C":"degC", "Celsius":"degC",
+                  "deg":"degrees", "degree":"degrees"}
+
+# CF standard names and units of the coordinates every product has
+coordinates = {"lat" :("latitude",  "degrees_north"),
+               "lon" :("longitude", "degrees_east"),
+               "time":("time",      None)}
+
+# Smallest signed type holding every value of each unsigned type
+signed = {"u1":"int16", "u2":"int32", "u4":"int64", "u8":"int64"}
+
+calendars = ["standard", "gregorian", "proleptic_gregorian", "julian", "noleap", "365_day",
+             "all_leap", "366_day", "360_day", "none"]
+time_units = re.compile(r"(days|hours|minutes|seconds|milliseconds|microseconds)\s+since\s+-?\d{1,4}-\d{1,2}-\d{1,2}")
+standard_name_form = re.compile(r"[a-z][a-z0-9_]*")
+
+#
+# A problem: what is wrong and, where it can be fixed in the header, the attributes.patch arguments that do it
+#
+def _problem(severity, variable, check, message, fix=None):
+    return {"severity":severity, "variable":variable, "check":check, "message":message, "fix":fix}
+
+def _dtype(var):
+    return None if var.dtype is str else np.dtype(var.dtype)
+
+def _check_types(name, var, dtype):
+    problems = []
+    if dtype.kind == "u":
+        problems.append(_problem("error", name, "unsigned", f"unsigned type {dtype} can't be served by OpenDAP",
+                                 {"casts":{name:signed[dtype.str[1:]]}}))
+    for att in typed_attrs:
+        if att not in var.ncattrs():
+            continue
+        value = np.asarray(var.getncattr(att))
+        if value.dtype != dtype:
+            fix = None
+            if att != "_FillValue" and value.dtype.kind in "fiu":
+                # _FillValue can't be changed once a variable has data
+                fix = {"variable_attrs":{name:{att:value.astype(dtype)}}}
+            problems.append(_problem("error", name, "fill-type", f"{att} is {value.dtype}, variable is {dtype}", fix))
+    return problems
+
+def _check_units(name, var, dtype, is_coordinate):
+    problems = []
+    atts = var.ncattrs()
+    standard_name, units = coordinates.get(name, (None, None))
+    if "units" not in atts:
+        if dtype.kind in "fiu" and "flag_values" not in atts and "flag_masks" not in atts:
+            problems.append(_problem("warning", name, "units", "no units",
+                                     {"variable_attrs":{name:{"units":units}}} if units else None))
+    elif str(var.units) in unit_spellings:
+        problems.append(_problem("warning", name, "units", f"units {var.units} should be {unit_spellings[var.units]}",
+                                 {"variable_attrs":{name:{"units":unit_spellings[var.units]}}}))
+    elif units is not None and str(var.units) != units:
+        problems.append(_problem("warning", name, "units", f"units {var.units} should be {units}",
+                                 {"variable_attrs":{name:{"units":units}}}))
+
+    if "standard_name" in atts:
+        if not standard_name_form.fullmatch(str(var.standard_name).split(" ")[0]):
+            problems.append(_problem("warning", name, "standard_name", f"standard_name {var.standard_name} isn't a CF name"))
+        elif standard_name is not None and var.standard_name != standard_name:
+            problems.append(_problem("warning", name, "standard_name", f"standard_name should be {standard_name}",
+                                     {"variable_attrs":{name:{"standard_name":standard_name}}}))
+    elif standard_name is not None:
+        problems.append(_problem("warning", name, "standard_name", "no standard_name",
+                                 {"variable_attrs":{name:{"standard_name":standard_name}}}))
+
+    if is_coordinate and "_FillValue" in atts:
+        problems.append(_problem("warning", name, "coordinate-fill", "coordinate variable has a _FillValue"))
+    return problems
+
+def _is_time(name, var):
+    return name == "time" or getattr(var, "standard_name", None) == "time" or " since " in str(getattr(var, "units", ""))
+
+def _check_time(name, var, dtype):
+    problems = []
+    if dtype is None or dtype.kind not in "fiu":
+        problems.append(_problem("error", name, "time-encoding", f"time stored as {var.dtype}, not as numbers"))
+    units = getattr(var, "units", None)
+    if units is None or not time_units.match(str(units).strip()):
+        problems.append(_problem("error", name, "time-encoding", f"time units {units!r} aren't '<units> since <date>'"))
+    calendar = getattr(var, "calendar", None)
+    if calendar is not None and calendar.lower() not in calendars:
+        problems.append(_problem("error", name, "time-encoding", f"unknown calendar {calendar}"))
+    return problems
+
+#
+# Problems in one file, from its header
+#
+def check(path, required=required_global):
+    problems = []
+    with netCDF4.Dataset(path) as nc:
+        for att in required:
+            if att not in nc.ncattrs():
+                problems.append(_problem("error", None, "global-attributes", f"no global attribute {att}",
+                                         {"global_attrs":{att:None}}))
+        for name, var in nc.variables.items():
+            dtype = _dtype(var)
+            if dtype is None or dtype.kind == "S":
+                if _is_time(name, var):
+                    problems += _check_time(name, var, dtype)
+                continue
+            problems += _check_types(name, var, dtype)
+            problems += _check_units(name, var, dtype, name in nc.dimensions)
+            if _is_time(name, var):
+                problems += _check_time(name, var, dtype)
+    return problems
+
+#
+# attributes.patch arguments fixing the problems that can be fixed;
+#   missing global attributes are fixed only if a value is given in global_attrs
+#
+def _fixes(problems, global_attrs):
+    fixes = {"global_attrs":{}, "variable_attrs":{}, "casts":{}}
+    fixed = []
+    for p in problems:
+        fix = p["fix"]
+        if fix is None:
+            continue
+        if "global_attrs" in fix:
+            fix = {"global_attrs":{k:global_attrs[k] for k in fix["global_attrs"] if k in global_attrs}}
+            if not fix["global_attrs"]:
+                continue
+        for kind, edits in fix.items():
+            if kind == "variable_attrs":
+                for v, atts in edits.items():
+                    fixes[kind].setdefault(v, {}).update(atts)
+            else:
+                fixes[kind].update(edits)
+        fixed.append(p)
+    return fixes, fixed
+
+def _report(problems):
+    return [{**{k:v for k, v in p.items() if k != "fix"}, "fixable":p["fix"] is not None} for p in problems]
+
+#
+# Check one file, fixing what can be fixed if fix is set; returns its entry in the report
+#   global_attrs supplies values for missing required global attributes
+#
+def validate(path, fix=False, required=required_global, global_attrs={}):
+    problems = check(path, required)
+    fixed = []
+    if fix and problems:
+        fixes, fixed = _fixes(problems, global_attrs)
+        if fixed:
+            attributes.patch(path, **fixes)
+            problems = check(path, required)
+    return {"file":str(path),
+            "errors":sum(p["severity"] == "error" for p in problems),
+            "problems":_report(problems),
+            "fixed":_report(fixed)}
+
+#
+# Check files in parallel; writes report (if given) as JSON and returns the entries for each file,
+#   including files that couldn't be read at all (as errors)
+#
+def run(files, report=None, fix=False, required=required_global, global_attrs={}, workers=None):
+    files = list(files)
+    results, failures = parallel.run(functools.partial(validate, fix=fix, required=required, global_attrs=global_attrs),
+                                     files, workers)
+    entries = [results[f] if f in results else
+               {"file":str(f), "errors":1, "fixed":[],
+                "problems":[{"severity":"error", "variable":None, "check":"readable",
+                             "message":failures[f].strip().splitlines()[-1], "fixable":False}]}
+               for f in files]
+    if report is not None:
+        with open(report, "w") as fh:
+            json.dump({"files":len(entries),
+                       "errors":sum(e["errors"] for e in entries),
+                       "warnings":sum(len(e["problems"]) - e["errors"] for e in entries),
+                       "entries":entries}, fh, indent=1, default=str)
+    return entries
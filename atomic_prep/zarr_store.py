@@ -0,0 +1,124 @@
+#
+# Campaign-wide Zarr store for a product, alongside the per-day netCDF files
+#   All flights (or dates) are concatenated along time, with consolidated metadata and chunks along time,
+#   so a query across the campaign opens one store and reads only the chunks it needs.
+#   Each sample carries its flight (YYYYMMDD) as a coordinate, and the store's "flight_index" attribute
+#   (JSON) gives the [start, stop) range along time for each flight along with the build key and file it
+#   came from. Flights are kept in time order. Appending a flight already in the store overwrites it in
+#   place if its length is unchanged; update() rebuilds the store from the files when a flight changes
+#   length or a new flight comes before the last one stored.
+#   Stores are written in Zarr format 2, whose string types and consolidated metadata every Zarr library reads.
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import json
+import pathlib
+import shutil
+
+import numpy  as np
+import xarray as xr
+
+from atomic_prep import encoding
+
+zarr_format = 2
+
+def read_index(store):
+    if not pathlib.Path(store).exists():
+        return {}
+    with xr.open_zarr(store, consolidated=True, zarr_format=zarr_format) as ds:
+        return json.loads(ds.attrs.get("flight_index", "{}"))
+
+def _write_index(store, index):
+    import zarr
+    zarr.open_group(str(store), mode="a", zarr_format=zarr_format).attrs["flight_index"] = json.dumps(index, sort_keys=True)
+    zarr.consolidate_metadata(str(store), zarr_format=zarr_format)
+
+def _zarr_encoding(ds, dim):
+    return {name:{"chunks":encoding._chunks(var, dim)} for name, var in ds.variables.items()
+            if var.ndim > 0 and var.dtype.kind in "fiuM"}
+
+# A flight can't be overwritten in place because its length has changed
+class LengthChanged(ValueError):
+    pass
+
+#
+# Add ds (one flight) to the store; key identifies the build it came from (e.g. the manifest key)
+#   and file the netCDF file it was read from
+#   New flights are appended at the end, so must not come before any flight already in the store
+#
+def append(store, ds, flight, key=None, dim="time", file=None):
+    store = pathlib.Path(store)
+    n     = ds.sizes[dim]
+    ds    = ds.assign_coords(flight=(dim, np.full(n, flight, dtype="<U8")))
+    index = read_index(store)
+    if not store.exists():
+        ds.to_zarr(store, mode="w", consolidated=True, encoding=_zarr_encoding(ds, dim), zarr_format=zarr_format)
+        start = 0
+    elif flight in index:
+        start, stop = index[flight]["start"], index[flight]["stop"]
+        if stop - start != n:
+            raise LengthChanged("{} has {} samples in {} but {} now; rebuild the store with export()".format(
+                                flight, stop - start, store, n))
+        ds.drop_vars([v for v in ds.variables if dim not in ds[v].dims]).to_zarr(
+            store, region={dim:slice(start, stop)}, zarr_format=zarr_format)
+    else:
+        if index and flight < max(index):
+            raise ValueError("{} comes before {} in {}; rebuild the store with export()".format(
+                             flight, max(index), store))
+        with xr.open_zarr(store, consolidated=True, zarr_format=zarr_format) as existing:
+            start = existing.sizes[dim]
+        ds.to_zarr(store, append_dim=dim, consolidated=True, zarr_format=zarr_format)
+    index[flight] = {"start":int(start), "stop":int(start + n), "key":key,
+                     "file":None if file is None else str(pathlib.Path(file).resolve())}
+    _write_index(store, index)
+
+def _add(store, flight, f, key, dim):
+    print("Adding {} to {}".format(flight, pathlib.Path(store).name))
+    # Read lazily but without dask, so chunks on disk don't have to line up with dask chunks
+    with xr.open_dataset(f) as ds:
+        append(store, ds, flight, key, dim, file=f)
+
+#
+# Add every flight in files = {YYYYMMDD:(netCDF file, build key)} whose key differs from the one in the store
+#   If a new flight comes before the last one stored, or a flight's length has changed, the store is
+#   rebuilt, in date order, from these files and those recorded in the store for the other flights
+#
+def update(store, files, dim="time"):
+    index = read_index(store)
+    todo  = {flight:(f, key) for flight, (f, key) in files.items()
+             if not (flight in index and key is not None and index[flight]["key"] == key)}
+    if not todo:
+        return
+    last = max(index) if index else None
+    if not any(flight not in index and flight < last for flight in todo if last is not None):
+        try:
+            for flight, (f, key) in sorted(todo.items()):
+                _add(store, flight, f, key, dim)
+            return
+        except LengthChanged as e:
+            print(str(e))
+    index = read_index(store)
+    recorded = {flight:(entry["file"], entry["key"]) for flight, entry in index.items()
+                if entry.get("file") is not None and pathlib.Path(entry["file"]).exists()}
+    lost = sorted(set(index) - set(recorded) - set(files))
+    if lost:
+        print("Files for {} aren't known; they're left out of {}".format(", ".join(lost), pathlib.Path(store).name))
+    print("Rebuilding " + pathlib.Path(store).name)
+    export(store, {**recorded, **files}, dim)
+
+#
+# (Re)build the store from scratch, in date order
+#
+def export(store, files, dim="time"):
+    shutil.rmtree(store, ignore_errors=True)
+    for flight, (f, key) in sorted(files.items()):
+        _add(store, flight, f, key, dim)
+
+#
+# (Re)build the store from one dataset covering many flights, split by UTC date
+#
+def export_dataset(store, ds, key=None, dim="time"):
+    shutil.rmtree(store, ignore_errors=True)
+    flights = ds[dim].dt.strftime("%Y%m%d").values
+    for flight in np.unique(flights):
+        append(store, ds.isel({dim:np.flatnonzero(flights == flight)}), flight, key, dim)
@@ -0,0 +1,4 @@
+#
+# Benchmarks for the reformatting pipelines, run on synthetic inputs with realistic shapes and names
+#   python -m benchmarks.run --help
+#
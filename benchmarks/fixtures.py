@@ -0,0 +1,112 @@
+#
+# Synthetic inputs with the shapes and variable names of the real campaign data
+#   scale shrinks every time dimension, e.g. for a quick check that the benchmarks still run
+#
+import datetime
+import pathlib
+
+import numpy  as np
+import xarray as xr
+
+from atomic_prep.products.flight_level import var_mapping
+from atomic_prep.products.microphysics import acronyms
+
+rng = np.random.default_rng(20200205)
+flight_date = datetime.date(2020, 2, 5)
+
+#
+# 10-hour, 25 Hz AOC Level-1 file with HH/MM/SS and every AOC variable in var_mapping;
+#   a few gaps in the time fields are NaN, as in the real files; format is passed to to_netcdf
+#
+def aoc_file(directory, hours=10., rate=25, scale=1., start_hour=14, format=None):
+    n   = int(hours * 3600 * rate * scale)
+    sod = start_hour * 3600. + np.arange(n) / rate
+    sod = np.floor(sod) % 86400
+    hms = {"HH":np.floor(sod / 3600), "MM":np.floor(sod % 3600 / 60), "SS":sod % 60}
+    gaps = rng.choice(n, size=max(n // 1000, 1), replace=False)
+    for v in hms.values():
+        v[gaps] = np.nan
+    ds = xr.Dataset({k:("Time", v.astype(np.float32)) for k, v in hms.items()})
+    for value in var_mapping.values():
+        ds[value] = ("Time", rng.normal(size=n).astype(np.float32), {"units":"mb" if value == "PS.c" else "1"})
+    f = pathlib.Path(directory).joinpath("Level_1", f"{flight_date:%Y%m%d}I1_AC.nc")
+    f.parent.mkdir(parents=True, exist_ok=True)
+    ds.to_netcdf(f, format=format)
+    return f
+
+#
+# Fairall/de Boer remote-sensing file (.cdf) with base_time/time_offset, 1 Hz over a 9-hour flight
+#
+def fairall_file(directory, hours=9., scale=1.):
+    n = int(hours * 3600 * scale)
+    base = np.datetime64(flight_date, "s") + np.timedelta64(14, "h")
+    offset = np.arange(n, dtype=np.float64)
+    ds = xr.Dataset(coords={"time":("time", base + offset.astype("timedelta64[s]"), {"description":"time"})})
+    ds["base_time"]   = ((), int((base - np.datetime64("1970-01-01T00:00:00")) / np.timedelta64(1, "s")))
+    ds["time_offset"] = ("time", offset)
+    for v in ["lat", "lon", "alt", "p", "pitch", "roll", "sst_IR", "sst_raw", "T_IR_CT", "T_Air_CT",
+              "U10_SMFR", "U10_SMFR_Corr", "Rain_Rate", "cind_radar", "cind_IR", "MSS_Radar"]:
+        ds[v] = ("time", rng.normal(size=n))
+    f = pathlib.Path(directory).joinpath("Level_3pre", f"{flight_date:%Y%m%d}_remote_sensing.cdf")
+    f.parent.mkdir(parents=True, exist_ok=True)
+    ds.to_netcdf(f)
+    return f
+
+#
+# The five microphysics files for one date: two best-estimate size distributions and three instruments
+#
+def microphysics_files(directory, hours=9., bins=30, scale=1.):
+    n = int(hours * 3600 * scale)
+    times = np.datetime64(flight_date, "ns") + np.timedelta64(14, "h") + np.arange(n) * np.timedelta64(1, "s")
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    files = []
+    for l in ["hydrometeor", "aerosol"]:
+        ds = xr.Dataset(coords={"time":times, l + "_size":np.logspace(0, 3, bins)})
+        ds[l + "_size_bnds"]      = ((l + "_size", "nv"), np.stack([ds[l + "_size"] * .9, ds[l + "_size"] * 1.1], axis=-1))
+        ds["number_concentration"] = (("time", l + "_size"), rng.lognormal(size=(n, bins)))
+        ds["effective_radius"]     = ("time", rng.lognormal(size=n))
+        files.append(directory.joinpath(l + f"{flight_date:_%Y%m%d}.nc"))
+        ds.to_netcdf(files[-1])
+    for l in acronyms.keys():
+        ds = xr.Dataset(coords={"time":times, "size":np.logspace(0, 3, bins)})
+        ds["size_bnds"]            = (("size", "nv"), np.stack([ds["size"] * .9, ds["size"] * 1.1], axis=-1))
+        ds["number_concentration"] = (("time", "size"), rng.lognormal(size=(n, bins)))
+        files.append(directory.joinpath(l + f"{flight_date:_%Y%m%d}.nc"))
+        ds.to_netcdf(files[-1])
+    return files
+
+#
+# AXBT Level-1 files, one profile each: temperature (C) and depth along sample, padded with NaN
+#
+def axbt_files(directory, count=5, samples=600):
+    d = pathlib.Path(directory).joinpath("Fairall_Level_1")
+    d.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i in range(count):
+        launch = np.datetime64(flight_date, "s") + np.timedelta64(14, "h") + i * np.timedelta64(600, "s")
+        n = rng.integers(samples // 2, samples)
+        depth = np.full(samples, np.nan)
+        depth[:n] = np.sort(rng.uniform(0, 800, size=n))
+        ds = xr.Dataset({"T"          :(("time", "sample"), [27. - 0.02 * depth], {"units":"C"}),
+                         "depth"      :(("time", "sample"), [depth], {"units":"m"}),
+                         "lat"        :("time", [13. + 0.1 * i]),
+                         "lon"        :("time", [-57. + 0.1 * i]),
+                         "base_time"  :((), 0),
+                         "time_offset":("time", [0.])},
+                        coords={"time":[launch]})
+        files.append(d.joinpath(f"axbt_{i:02d}.cdf"))
+        ds.to_netcdf(files[-1])
+    return files
+
+#
+# Ragged AXBT-like profiles: depth (sorted, 0 to 400-900 m) and temperature (K) after dropna
+#
+def axbt_profiles(count=150, scale=1.):
+    count  = max(int(count * scale), 1)
+    depths, temperatures = [], []
+    for bottom in rng.uniform(400, 900, size=count):
+        depth = np.sort(rng.uniform(0, bottom, size=int(bottom * 6)))
+        depths.append(depth)
+        temperatures.append(300. - 0.02 * depth + rng.normal(scale=0.05, size=depth.size))
+    return depths, temperatures
@@ -0,0 +1,164 @@
+#
+# Time each pipeline stage on synthetic inputs and track peak memory
+#   Each stage runs in a fresh process so that its peak resident memory isn't inherited from earlier stages.
+#   Results (with library versions) are saved as JSON; --compare reports changes relative to earlier results.
+#
+#   python -m benchmarks.run [--scale 0.1] [--output results.json] [--compare baseline.json]
+#
+import argparse
+import dataclasses
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy  as np
+import xarray as xr
+
+from atomic_prep import aoc, engine, profiles
+from atomic_prep.products import flight_level, microphysics, remote_sensing
+from benchmarks import fixtures
+
+#
+# Stages: each takes the fixture directory and the scale
+#
+def time_index(directory, scale):
+    with xr.open_dataset(next(pathlib.Path(directory).glob("Level_1/*AC.nc")), decode_times=False) as full:
+        hms = [full[v].values for v in aoc.time_variables]
+    valid = aoc.valid_time_mask(*hms)
+    start = time.perf_counter(), time.process_time()
+    aoc.time_index(fixtures.flight_date, *(t[valid] for t in hms))
+    return start
+
+def masked_extraction(directory, scale):
+    start = time.perf_counter(), time.process_time()
+    full = aoc.open_level1(next(pathlib.Path(directory).glob("Level_1/*AC.nc")))
+    aoc.extract(full, fixtures.flight_date, flight_level.var_mapping)
+    full.close()
+    return start
+
+# The same file in the 64-bit offset format, memory-mapped
+def mapped_extraction(directory, scale):
+    return masked_extraction(pathlib.Path(directory).joinpath("classic"), scale)
+
+#
+# Whole products, through the same engine as the scripts, with inputs and outputs in the fixture directory
+#
+def _build(spec, unit):
+    start = time.perf_counter(), time.process_time()
+    engine.build(spec, unit)
+    return start
+
+def flight_level_product(directory, scale):
+    directory = pathlib.Path(directory)
+    return _build(dataclasses.replace(flight_level.spec, input_dir=directory.joinpath("Level_1"),
+                                      output_dir=directory.joinpath("Level_2")),
+                  fixtures.flight_date)
+
+def remote_sensing_product(directory, scale):
+    directory = pathlib.Path(directory)
+    spec = dataclasses.replace(remote_sensing.spec, input_dir=directory.joinpath("Level_3pre"),
+                               output_dir=directory.joinpath("Level_3"))
+    return _build(spec, spec.units(spec)[0])
+
+def merge(directory, scale):
+    directory = pathlib.Path(directory).joinpath("microphysics")
+    return _build(dataclasses.replace(microphysics.spec, input_dir=directory, output_dir=directory),
+                  fixtures.flight_date)
+
+def interpolation(directory, scale):
+    depths, temperatures = fixtures.axbt_profiles(scale=scale)
+    start = time.perf_counter(), time.process_time()
+    profiles.interp_ragged(np.arange(0, 1000., .1), depths, temperatures)
+    return start
+
+def write(directory, scale):
+    depths, temperatures = fixtures.axbt_profiles(scale=scale)
+    f = pathlib.Path(directory).joinpath("axbt_level_3.nc")
+    xr.Dataset(coords={"time":np.arange(len(depths)), "depth":np.arange(0, 1000., .1)}).to_netcdf(f)
+    start = time.perf_counter(), time.process_time()
+    profiles.write_interpolated(f, "temperature", {"units":"K"}, "depth", np.arange(0, 1000., .1),
+                                depths, temperatures)
+    return start
+
+stages = {"time-index":time_index,
+          "masked-extraction":masked_extraction,
+          "mapped-extraction":mapped_extraction,
+          "flight-level":flight_level_product,
+          "remote-sensing":remote_sensing_product,
+          "merge":merge,
+          "interpolation":interpolation,
+          "write":write}
+
+#
+# Runs in a fresh worker process; each stage returns the (wall, cpu) times at which the timed work began
+#   An untimed first run imports the I/O backends (xarray, netCDF4, dask...) and warms the file cache;
+#   times are from a second run without tracing, which would slow it down, and the peak traced memory
+#   from a third
+#
+def _measure(name, directory, scale):
+    os.environ["ATOMIC_PREP_FORCE"] = "all"
+    stages[name](directory, scale)
+    wall, cpu = stages[name](directory, scale)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    tracemalloc.start()
+    stages[name](directory, scale)
+    traced = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"wall_s":wall, "cpu_s":cpu,
+            "peak_traced_mb":traced / 2**20,
+            # ru_maxrss is in kB on Linux
+            "max_rss_mb":resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10}
+
+def make_fixtures(directory, scale):
+    fixtures.aoc_file(directory, scale=scale)
+    fixtures.aoc_file(pathlib.Path(directory).joinpath("classic"), scale=scale, format="NETCDF3_64BIT")
+    fixtures.fairall_file(directory, scale=scale)
+    fixtures.microphysics_files(pathlib.Path(directory).joinpath("microphysics"), scale=scale)
+
+def versions():
+    import netCDF4
+    return {"python":platform.python_version(), "numpy":np.__version__,
+            "xarray":xr.__version__, "netCDF4":netCDF4.__version__}
+
+def compare(results, baseline, tolerance=0.1):
+    print("{:20s} {:>10s} {:>10s} {:>8s}".format("stage", "wall (s)", "baseline", "ratio"))
+    for name, r in results["stages"].items():
+        if name in baseline["stages"]:
+            b = baseline["stages"][name]["wall_s"]
+            ratio = r["wall_s"] / b if b > 0 else float("inf")
+            print("{:20s} {:10.3f} {:10.3f} {:8.2f}{}".format(name, r["wall_s"], b, ratio,
+                                                             "  SLOWER" if ratio > 1 + tolerance else ""))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the reformatting pipeline stages on synthetic data")
+    parser.add_argument("--scale",   type=float, default=1., help="Fraction of realistic time dimensions")
+    parser.add_argument("--stages",  nargs="+", choices=stages.keys(), default=list(stages.keys()))
+    parser.add_argument("--output",  type=pathlib.Path, default=pathlib.Path("benchmarks/results.json"))
+    parser.add_argument("--compare", type=pathlib.Path, help="Earlier results to compare against")
+    args = parser.parse_args()
+
+    results = {"date":time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()),
+               "scale":args.scale, "versions":versions(), "stages":{}}
+    with tempfile.TemporaryDirectory() as directory:
+        make_fixtures(directory, args.scale)
+        context = multiprocessing.get_context("spawn")
+        for name in args.stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results["stages"][name] = pool.submit(_measure, name, directory, args.scale).result()
+            r = results["stages"][name]
+            print("{:20s} wall {:8.3f} s  cpu {:8.3f} s  peak traced {:8.1f} MB  max RSS {:8.1f} MB".format(
+                  name, r["wall_s"], r["cpu_s"], r["peak_traced_mb"], r["max_rss_mb"]))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=1)
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(results, json.load(fh))
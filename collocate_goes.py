@@ -0,0 +1,70 @@
+#
+# Collocate GOES-16 CLAVR-x cloud retrievals from the AERIS THREDDS server with the P3 flight track
+#   The track (time, lat, lon) comes from the Level-2 flight-level files written by extract_flight_level_summary.py
+#   Output: one file per flight with the retrievals at the pixel nearest the aircraft at each time
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import xarray as xr
+import numpy  as np
+import pathlib
+
+from atomic_prep import collocate, encoding, parallel
+from atomic_prep.product import Product
+from atomic_prep.products import flight_level
+
+n_workers = parallel.default_workers()
+
+variables = ["cloud_mask",
+             "cloud_type",
+             "cld_height_acha",
+             "cld_temp_acha",
+             "cld_opd_dcomp",
+             "cld_reff_dcomp",
+             "refl_0_65um_nom",
+             "temp_11_0um_nom"]
+
+def units(spec):
+    return sorted(spec.input_dir.glob("*.nc"))
+
+def inputs(spec, f):
+    return [f]
+
+# The flight track
+def read(spec, inputs, f, rec=None):
+    with xr.open_dataset(inputs[0]) as fl:
+        return fl[["lat", "lon"]].load()
+
+def file_date(spec, f, track):
+    return track.time.values[0].astype("datetime64[s]").item()
+
+spec = Product(product    = "GOES-collocated",
+               version    = "v0.1",
+               contact    = "Robert Pincus <Robert.Pincus@colorado.edu>",
+               input_dir  = flight_level.spec.output_dir,
+               output_dir = pathlib.Path("data/GOES-collocated"),
+               units      = units,
+               inputs     = inputs,
+               read       = read,
+               source     = __file__,
+               file_date  = file_date,
+               zarr_export = False)
+
+def collocate_flight(f):
+    track = spec.read(spec, spec.inputs(spec, f), f)
+    index = collocate.grid_index(np.unique(collocate.granule_minutes(track.time.values)))
+    out = collocate.collocate(track.time.values, track.lat.values, track.lon.values, variables, index)
+    out["lat"] = track.lat
+    out["lon"] = track.lon
+    out.attrs = {**spec.global_attrs(),
+                 "source":"GOES-16 CLAVR-x 2 km 1-minute retrievals, AERIS EUREC4A THREDDS server"}
+    fileName = spec.file_name(spec.file_date(spec, f, track))
+    print("Writing " + fileName)
+    out.to_netcdf(spec.output_dir.joinpath(fileName), encoding=encoding.encoding(out))
+    return fileName
+
+if __name__ == "__main__":
+    spec.output_dir.mkdir(parents=True, exist_ok=True)
+    results, failures = parallel.run(collocate_flight, spec.units(spec), n_workers)
+    if failures:
+        raise SystemExit(1)
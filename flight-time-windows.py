@@ -1,13 +1,21 @@
-import xarray as xr
-import numpy  as np
-import datetime
-import time
+#
+# Time index of the flight-level and remote-sensing files
+#   Builds (or refreshes) the persistent index and prints each file's time window;
+#   use atomic_prep.catalog.query to find the files and index ranges overlapping any UTC interval, e.g.
+#     catalog.query(catalog.load(index_file), "2020-02-05T14:00", "2020-02-05T15:00")
+#
 import pathlib
 
-dataDir = pathlib.Path("Fairall-summary-data/flight-level-summary")
-for f in sorted(dataDir.glob("2020*_A*.nc")):
-    aoc = xr.open_dataset(f, decode_times = False)
-    hours = aoc.HH.where(xr.ufuncs.logical_not(xr.ufuncs.isnan(aoc.HH)), drop = True)
-    # Is the last hour larger than the first hour? This means all UTC hours are in the same day
-    print("Start hour: ", "{:02d}".format(int(hours[0].values)), ", End hour: ", "{:02d}".format(int(hours[-1].values)), (hours[-1] - hours[0]).values >= 0)
-    aoc.close()
+from atomic_prep import catalog
+from atomic_prep.products import flight_level, remote_sensing
+
+index_file = pathlib.Path("data/time-index.json")
+
+if __name__ == "__main__":
+    entries = catalog.build(index_file,
+                            {spec.product:sorted(spec.output_dir.glob("*.nc"))
+                             for spec in [flight_level.spec, remote_sensing.spec]})
+    for e in sorted(entries, key=lambda e: (e["flight"], e["product"])):
+        print("{:8s} {:15s} Start: {}  End: {}  Samples: {:8d}  Airborne: {}".format(
+              e["flight"], e["product"], e["start"], e["end"], e["samples"],
+              " - ".join(e.get("airborne", ["n/a"]))))
@@ -0,0 +1,74 @@
+#
+# Join the flight-level, remote-sensing, and microphysics products for each flight onto the flight-level time axis
+#   Output: one multi-instrument file per flight
+#
+# Contact: Robert Pincus <Robert.Pincus@colorado.edu>
+#
+import xarray as xr
+import numpy  as np
+import datetime
+import pathlib
+
+from atomic_prep import align, catalog, parallel
+from atomic_prep.product import Product
+from atomic_prep.products import flight_level, microphysics, remote_sensing
+
+n_workers = parallel.default_workers()
+
+#
+# Products aligned to the flight-level data: (spec, prefix for clashing names, method, tolerance)
+#
+sources = [(remote_sensing.spec, "rs", "linear",  np.timedelta64(2, "s")),
+           (microphysics.spec,   "mp", "nearest", np.timedelta64(1, "s"))]
+
+def product_files(spec):
+    return catalog.files_by_date(sorted(spec.output_dir.glob("*.nc")))
+
+base_files   = product_files(flight_level.spec)
+source_files = [product_files(s[0]) for s in sources]
+
+def units(spec):
+    return [datetime.datetime.strptime(d, "%Y%m%d").date() for d in sorted(base_files.keys())]
+
+# The flight-level file, then those of the sources with data for the date
+def inputs(spec, d):
+    date = f"{d:%Y%m%d}"
+    return [base_files[date]] + [files[date] for files in source_files if date in files]
+
+def read(spec, inputs, d, rec=None):
+    with xr.open_dataset(inputs[0]) as base:
+        return base.load()
+
+spec = Product(product    = "Joined",
+               version    = "v0.1",
+               contact    = "Robert Pincus <Robert.Pincus@colorado.edu>",
+               input_dir  = flight_level.spec.output_dir,
+               output_dir = pathlib.Path("data/joined"),
+               units      = units,
+               inputs     = inputs,
+               read       = read,
+               source     = __file__,
+               zarr_export = False)
+
+def join_flight(d):
+    date = f"{d:%Y%m%d}"
+    fileName = spec.file_name(d)
+    print("Writing " + fileName)
+    base = spec.read(spec, spec.inputs(spec, d), d)
+    opened = {}
+    for (source, prefix, method, tolerance), files in zip(sources, source_files):
+        if date in files:
+            opened[prefix] = (xr.open_dataset(files[date]), method, tolerance)
+    base.attrs = {**spec.global_attrs(),
+                  "sources":", ".join([flight_level.spec.product] +
+                                      [s[0].product for s, files in zip(sources, source_files) if date in files])}
+    align.join(spec.output_dir.joinpath(fileName), base, opened)
+    for ds, method, tolerance in opened.values():
+        ds.close()
+    return fileName
+
+if __name__ == "__main__":
+    spec.output_dir.mkdir(parents=True, exist_ok=True)
+    results, failures = parallel.run(join_flight, spec.units(spec), n_workers)
+    if failures:
+        raise SystemExit(1)
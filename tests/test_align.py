@@ -0,0 +1,41 @@
+import numpy  as np
+import xarray as xr
+
+from atomic_prep import align
+
+t0 = np.datetime64("2020-02-05T12:00:00", "ns")
+
+def _source(n=5):
+    time = t0 + np.arange(n) * np.timedelta64(2, "s")
+    return xr.Dataset({"temperature":("time", np.arange(n, dtype=np.float32)),
+                       "flag"       :("time", np.arange(n, dtype=np.int8)),
+                       "sensor"     :("time", np.array(list("abcde"[:n]), dtype="U1")),
+                       "launch"     :("time", time - np.timedelta64(60, "s")),
+                       "platform"   :((), "P3")},
+                      coords={"time":time})
+
+def test_linear_interpolates_only_floats():
+    target = t0 + np.array([1, 3, 20]) * np.timedelta64(1, "s")
+    out = align.align(_source(), target, "linear", np.timedelta64(2, "s"))
+    np.testing.assert_allclose(out.temperature.values, [0.5, 1.5, np.nan])
+    np.testing.assert_array_equal(out.flag.values, [1, 2, np.nan])
+    assert out.sensor.dtype.kind == "U"
+    assert list(out.sensor.values) == ["b", "c", ""]
+    assert out.launch.dtype.kind == "M"
+    np.testing.assert_array_equal(out.launch.values[:2], t0 + np.array([-58, -56]) * np.timedelta64(1, "s"))
+    assert np.isnat(out.launch.values[2])
+    assert out.platform.values == "P3"
+
+def test_nearest_keeps_times():
+    target = t0 + np.array([0, 4]) * np.timedelta64(1, "s")
+    out = align.align(_source(), target)
+    np.testing.assert_array_equal(out.launch.values, _source().launch.values[[0, 2]])
+
+def test_empty_source_is_all_missing():
+    target = t0 + np.arange(4) * np.timedelta64(1, "s")
+    out = align.align(_source(0), target, "linear")
+    assert out.sizes["time"] == 4
+    assert np.all(np.isnan(out.temperature.values))
+    assert np.all(np.isnan(out.flag.values))
+    assert np.all(np.isnat(out.launch.values))
+    assert list(out.sensor.values) == [""] * 4
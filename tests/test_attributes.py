@@ -0,0 +1,61 @@
+import netCDF4
+import numpy  as np
+import pytest
+
+from atomic_prep import attributes, validate
+from atomic_prep.products import wsra
+
+@pytest.fixture
+def wsra_file(tmp_path):
+    path = tmp_path.joinpath("WSRA-L4-20200205I.nc")
+    with netCDF4.Dataset(path, "w", format="NETCDF4") as nc:
+        nc.createDimension("time", 4)
+        nc.createVariable("time", "u4", ("time",))[:] = np.arange(4)
+        nc["time"].units = "seconds since 2020-02-05 00:00:00"
+        nc.createVariable("trajectory", "u4", ())[...] = 1
+        nc.createVariable("dominant_wave_height", "f8", ("time",))[:] = [1., 2., -999., 3.]
+        nc.createVariable("rainfall_rate", "f4", ("time",))[:] = [0., 1., 2., -999.]
+        nc.createVariable("flags", "u2", ("time",), fill_value=np.uint16(65535))[:] = [0, 1, 2, 3]
+        nc.title = "WSRA"
+    return path
+
+def _attrs(path, v):
+    with netCDF4.Dataset(path) as nc:
+        return {k:nc[v].getncattr(k) for k in nc[v].ncattrs()}
+
+def test_in_place_casts_fill_values(wsra_file):
+    path = attributes.patch(wsra_file, global_attrs={"platform":"P3"}, delete_global=["title"],
+                            variable_attrs={v:{"missing_value":-999.} for v in ["dominant_wave_height", "rainfall_rate"]})
+    assert path == wsra_file
+    assert _attrs(path, "dominant_wave_height")["missing_value"].dtype == np.float64
+    assert _attrs(path, "rainfall_rate")["missing_value"].dtype == np.float32
+    with netCDF4.Dataset(path) as nc:
+        assert nc.platform == "P3"
+        assert "title" not in nc.ncattrs()
+    assert not [p for p in validate.check(path, required=[]) if p["check"] == "fill-type"]
+
+def test_rewrite_casts_without_adding_fill_values(wsra_file):
+    path = attributes.patch(wsra_file, global_attrs={"platform":"P3"},
+                            variable_attrs={"dominant_wave_height":{"missing_value":-999.}},
+                            casts={"flags":"int32", "time":"int32", "trajectory":"int32"})
+    with netCDF4.Dataset(path) as nc:
+        assert nc["flags"].dtype == np.int32
+        assert nc["time"].dtype == np.int32
+        assert nc.platform == "P3"
+        np.testing.assert_array_equal(nc["dominant_wave_height"][:].data, [1., 2., -999., 3.])
+    assert _attrs(path, "flags")["_FillValue"].dtype == np.int32
+    assert _attrs(path, "dominant_wave_height") == {"missing_value":-999.}
+    assert "_FillValue" not in _attrs(path, "rainfall_rate")
+    assert not [p for p in validate.check(path, required=[]) if p["severity"] == "error"]
+
+def test_rename(wsra_file):
+    path = attributes.patch(wsra_file, rename=(r"WSRA-L4-(.*)I\.nc", r"EUREC4A_ATOMIC_P3_WSRA_\1_v1.0.nc"))
+    assert path.name == "EUREC4A_ATOMIC_P3_WSRA_20200205_v1.0.nc"
+    assert path.exists() and not wsra_file.exists()
+    assert attributes.patch(path, rename=(r"WSRA-L4-(.*)I\.nc", r"\1.nc")) == path
+
+def test_wsra_patch_passes_validation(wsra_file):
+    path = wsra.patch(wsra_file)
+    assert path.name == f"EUREC4A_ATOMIC_P3_WSRA_20200205_{wsra.wsra_version}.nc"
+    errors = [p for p in validate.check(path, required=list(wsra.global_attrs)) if p["severity"] == "error"]
+    assert [p["variable"] for p in errors] == ["flags"]
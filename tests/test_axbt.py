@@ -0,0 +1,31 @@
+import dataclasses
+
+import netCDF4
+import pytest
+
+from atomic_prep import engine, manifest, zarr_store
+from atomic_prep.products import axbt
+from benchmarks import fixtures
+
+@pytest.fixture
+def spec(tmp_path, monkeypatch):
+    monkeypatch.delenv("ATOMIC_PREP_FORCE", raising=False)
+    monkeypatch.setenv("ATOMIC_PREP_LOG", str(tmp_path.joinpath("log.jsonl")))
+    fixtures.axbt_files(tmp_path, count=3)
+    return dataclasses.replace(axbt.spec, input_dir=tmp_path.joinpath("Fairall_Level_1"), output_dir=tmp_path)
+
+def test_axbt_is_built_by_the_engine(spec):
+    results, failures = engine.run(spec, workers=1)
+    assert not failures
+    outputs = results["campaign"]
+    assert len(outputs) == 4
+    assert outputs[-1] == "Level_3/P3_AXBT_Level_3_{}.nc".format(spec.version)
+    assert manifest.outputs(spec.output_dir, "campaign") == outputs
+    with netCDF4.Dataset(spec.output_dir.joinpath(outputs[0])) as nc:
+        assert nc.instrument == "AXBT"
+        assert nc["temperature"].units == "K"
+    index = zarr_store.read_index(spec.zarr_store)
+    assert list(index) == [f"{fixtures.flight_date:%Y%m%d}"]
+
+    assert not engine.is_stale(spec, "campaign")
+    assert engine.build(spec, "campaign") == outputs
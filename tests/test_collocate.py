@@ -0,0 +1,59 @@
+import numpy  as np
+import pytest
+import xarray as xr
+
+from atomic_prep import collocate
+
+lat, lon = np.meshgrid(np.arange(10., 15., .02), np.arange(-60., -55., .02), indexing="ij")
+field = np.arange(lat.size, dtype=np.float64).reshape(lat.shape)
+
+def fake_fetch(missing=()):
+    urls = []
+    def fetch(url, variables, isel=None, auth=None):
+        urls.append(url)
+        if url in missing:
+            raise OSError("no such granule")
+        ds = xr.Dataset({collocate.lat_name:(("y", "x"), lat),
+                         collocate.lon_name:(("y", "x"), lon),
+                         "cloud_mask":(("y", "x"), field, {"units":"1"})})
+        return ds[variables].isel(isel or {})
+    return fetch, urls
+
+def test_grid_index_formats_datetime64_minutes(monkeypatch):
+    fetch, urls = fake_fetch()
+    monkeypatch.setattr(collocate.remote, "fetch", fetch)
+    minutes = collocate.granule_minutes(np.array(["2020-02-05T14:00:31"], dtype="datetime64[ns]"))
+    index = collocate.grid_index(minutes)
+    assert urls == [collocate.granule_url_at(np.datetime64("2020-02-05T14:01"))]
+    assert "2020_036_1401" in urls[0]
+    assert index.shape == lat.shape
+
+def test_grid_index_falls_back_to_later_granules(monkeypatch):
+    minutes = np.arange(np.datetime64("2020-02-05T14:00"), np.datetime64("2020-02-05T14:03"))
+    fetch, urls = fake_fetch(missing=[collocate.granule_url_at(minutes[0])])
+    monkeypatch.setattr(collocate.remote, "fetch", fetch)
+    collocate.grid_index(minutes)
+    assert urls == [collocate.granule_url_at(m) for m in minutes[:2]]
+
+def test_grid_index_gives_up(monkeypatch):
+    minutes = np.arange(np.datetime64("2020-02-05T14:00"), np.datetime64("2020-02-05T14:03"))
+    fetch, urls = fake_fetch(missing=[collocate.granule_url_at(m) for m in minutes])
+    monkeypatch.setattr(collocate.remote, "fetch", fetch)
+    with pytest.raises(RuntimeError):
+        collocate.grid_index(minutes)
+
+def test_collocate_nearest_pixel(monkeypatch):
+    fetch, urls = fake_fetch()
+    monkeypatch.setattr(collocate.remote, "fetch", fetch)
+    index = collocate.GridIndex(lat, lon, ("y", "x"))
+    times = np.datetime64("2020-02-05T14:00:00", "ns") + np.arange(5) * np.timedelta64(40, "s")
+    rows, cols = np.array([3, 50, 120, 200, 240]), np.array([7, 100, 30, 180, 249])
+    track_lat = lat[rows, cols] + .004
+    track_lon = lon[rows, cols] - .004
+    track_lat[2] = np.nan
+    out = collocate.collocate(times, track_lat, track_lon, ["cloud_mask"], index, workers=2)
+    expected = field[rows, cols]
+    expected[2] = np.nan
+    np.testing.assert_array_equal(out.cloud_mask.values, expected)
+    assert np.isnan(out.pixel_distance.values[2])
+    assert np.nanmax(out.pixel_distance.values) < 1.
@@ -0,0 +1,24 @@
+import dataclasses
+
+import pytest
+
+from atomic_prep import derived, engine
+from atomic_prep.products import flight_level
+from benchmarks import fixtures
+
+@pytest.fixture(params=[False, True], ids=["numpy", "dask"])
+def source(tmp_path, request):
+    f = fixtures.aoc_file(tmp_path, scale=0.001)
+    spec = dataclasses.replace(flight_level.spec, input_dir=f.parent)
+    ds = engine.cf_fixup(spec, spec.read(spec, [f], fixtures.flight_date))
+    return spec, ds.chunk({"time":100}) if request.param else ds
+
+def test_outputs_have_only_their_own_attributes(source):
+    spec, ds = source
+    out = derived.apply(ds, spec.to_kelvin, spec.derived)
+    assert out.pitchradar.attrs == spec.derived["pitchradar"].attrs
+    assert out.qair.attrs == spec.derived["qair"].attrs
+    assert out.Td.attrs == dict(ds.Td.attrs, units="K")
+    assert out.Ta.attrs["standard_name"] == "air_temperature"
+    assert out.Ta.attrs["AOC_name"] == "TA.d"
+    assert float((out.Ta - ds.Ta).mean()) == pytest.approx(273.15)
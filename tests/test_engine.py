@@ -0,0 +1,31 @@
+import dataclasses
+
+import pytest
+
+from atomic_prep import engine
+from atomic_prep.products import remote_sensing
+from benchmarks import fixtures
+
+@pytest.fixture
+def spec(tmp_path, monkeypatch):
+    monkeypatch.delenv("ATOMIC_PREP_FORCE", raising=False)
+    monkeypatch.setenv("ATOMIC_PREP_LOG", str(tmp_path.joinpath("log.jsonl")))
+    fixtures.fairall_file(tmp_path, scale=0.01)
+    return dataclasses.replace(remote_sensing.spec, input_dir=tmp_path.joinpath("Level_3pre"),
+                               output_dir=tmp_path.joinpath("Level_3"), zarr_export=False)
+
+def test_remote_sensing_targets_are_dates(spec, monkeypatch):
+    unit = spec.units(spec)[0]
+    assert engine.target_name(spec, unit) == f"{fixtures.flight_date:%Y%m%d}"
+    results, failures = engine.run(spec, workers=1)
+    assert not failures
+    assert not engine.is_stale(spec, unit)
+    monkeypatch.setenv("ATOMIC_PREP_FORCE", f"{fixtures.flight_date:%Y%m%d}")
+    assert engine.is_stale(spec, unit)
+    monkeypatch.setenv("ATOMIC_PREP_FORCE", "20200101")
+    assert not engine.is_stale(spec, unit)
+
+def test_remote_sensing_targets_come_from_file_names(spec):
+    # The file needn't exist: listing and dry runs don't open any inputs
+    f = spec.input_dir.joinpath("EUREC4A_ATOMIC_P3_Remote-sensing_20200117_v1.1.cdf")
+    assert engine.target_name(spec, f) == "20200117"
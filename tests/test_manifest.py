@@ -0,0 +1,43 @@
+import pathlib
+
+from atomic_prep import engine, manifest
+from atomic_prep.products import flight_level
+
+def write(path, text):
+    path.write_text(text)
+    return path
+
+def test_key_depends_on_every_source(tmp_path):
+    data    = write(tmp_path.joinpath("input.nc"), "data")
+    script  = write(tmp_path.joinpath("script.py"), "a = 1")
+    helper  = write(tmp_path.joinpath("helper.py"), "b = 1")
+    key = manifest.build_key([data], {"version":"v1"}, [script, helper])
+    assert key == manifest.build_key([data], {"version":"v1"}, [script, helper])
+    write(helper, "b = 2")
+    assert key != manifest.build_key([data], {"version":"v1"}, [script, helper])
+
+def test_single_script_is_accepted(tmp_path):
+    script = write(tmp_path.joinpath("script.py"), "a = 1")
+    assert manifest.build_key([], {}, script) == manifest.build_key([], {}, [script])
+
+def test_engine_key_includes_library_modules():
+    sources = [pathlib.Path(s).name for s in engine.sources(flight_level.spec)]
+    assert sources[0] == "flight_level.py"
+    assert {"engine.py", "encoding.py", "derived.py", "aoc.py"} <= set(sources)
+
+def test_record_and_is_current(tmp_path, monkeypatch):
+    monkeypatch.delenv("ATOMIC_PREP_FORCE", raising=False)
+    write(tmp_path.joinpath("out.nc"), "output")
+    manifest.record(tmp_path, "20200205", "k1", ["out.nc"])
+    assert manifest.is_current(tmp_path, "20200205", "k1")
+    assert not manifest.is_current(tmp_path, "20200205", "k2")
+    tmp_path.joinpath("out.nc").unlink()
+    assert not manifest.is_current(tmp_path, "20200205", "k1")
+
+def test_forced(monkeypatch):
+    monkeypatch.setenv("ATOMIC_PREP_FORCE", "Flight-Level, 20200203")
+    assert manifest.forced("Flight-Level")
+    assert manifest.forced("Remote-sensing", "20200203")
+    assert not manifest.forced("Remote-sensing", "20200205")
+    monkeypatch.setenv("ATOMIC_PREP_FORCE", "all")
+    assert manifest.forced("anything")
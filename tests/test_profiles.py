@@ -0,0 +1,49 @@
+import netCDF4
+import numpy  as np
+import xarray as xr
+
+from atomic_prep import profiles
+
+rng = np.random.default_rng(6)
+
+def reference(grid, coords, values):
+    return np.array([np.full(grid.size, np.nan) if len(c) == 0 else
+                     xr.DataArray(v, dims="depth", coords={"depth":c}).interp(depth=grid).values
+                     for c, v in zip(coords, values)])
+
+def ragged(count):
+    coords, values = [], []
+    for i in range(count):
+        c = rng.uniform(rng.uniform(0, 50), rng.uniform(100, 900), size=rng.integers(2, 300))
+        coords.append(c)
+        values.append(300. - 0.02 * c + rng.normal(size=c.size))
+    return coords, values
+
+def test_matches_xarray_interp():
+    grid = np.arange(-10, 1000., 2.5)
+    coords, values = ragged(20)
+    # Unsorted, empty, single-sample, and entirely outside the grid
+    coords[3], values[3] = coords[3][::-1], values[3][::-1]
+    shuffle = rng.permutation(coords[5].size)
+    coords[5], values[5] = coords[5][shuffle], values[5][shuffle]
+    coords[7], values[7] = np.array([]), np.array([])
+    coords[9], values[9] = np.array([2000., 2100.]), np.array([1., 2.])
+    expected = reference(grid, coords, values)
+    result = profiles.interp_ragged(grid, coords, values)
+    np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-8)
+    assert np.isnan(result[7]).all() and np.isnan(result[9]).all()
+
+def test_all_empty():
+    result = profiles.interp_ragged(np.arange(5.), [np.array([])] * 3, [np.array([])] * 3)
+    assert result.shape == (3, 5) and np.isnan(result).all()
+
+def test_write_interpolated_in_chunks(tmp_path):
+    grid = np.arange(0, 500., 1.)
+    coords, values = ragged(7)
+    path = tmp_path.joinpath("profiles.nc")
+    xr.Dataset(coords={"time":np.arange(7), "depth":grid}).to_netcdf(path)
+    profiles.write_interpolated(path, "temperature", {"units":"K"}, "depth", grid, coords, values, chunk=3)
+    with netCDF4.Dataset(path) as nc:
+        written = nc["temperature"][:].filled(np.nan)
+    np.testing.assert_allclose(written, reference(grid, coords, values).astype(np.float32), equal_nan=True)
@@ -0,0 +1,29 @@
+import matplotlib.pyplot as plt
+import pytest
+from pypdf import PdfReader
+
+from atomic_prep import quicklook
+
+def page(item):
+    fig, ax = plt.subplots()
+    ax.set_title(f"page {item}")
+    return fig
+
+def failing_page(item):
+    if item == 2:
+        raise ValueError("bad page")
+    return page(item)
+
+def titles(path):
+    return [p.extract_text().strip().splitlines()[-1] for p in PdfReader(path).pages]
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_pages_in_order(tmp_path, workers):
+    a, b = tmp_path.joinpath("a.pdf"), tmp_path.joinpath("b.pdf")
+    quicklook.write_pdfs({a:(page, [0, 1, 2, 3]), b:(page, [10])}, workers=workers)
+    assert titles(a) == ["page 0", "page 1", "page 2", "page 3"]
+    assert titles(b) == ["page 10"]
+
+def test_failing_page_raises(tmp_path):
+    with pytest.raises(ValueError):
+        quicklook.write_pdf(tmp_path.joinpath("a.pdf"), failing_page, range(4), workers=2)
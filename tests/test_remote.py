@@ -0,0 +1,127 @@
+import os
+import threading
+import urllib.parse
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+import numpy  as np
+import pytest
+import xarray as xr
+
+from atomic_prep import remote
+
+pydap = pytest.importorskip("pydap")
+from pydap.handlers.lib import BaseHandler
+from pydap.model import BaseType, DatasetType
+
+class _Quiet(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+#
+# A DAP server on localhost, serving three granules with pydap's own handler; every request
+#   (path, decoded constraint expression, Authorization header) is recorded
+#
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    handlers = {}
+    for i in range(3):
+        ds = DatasetType(f"granule{i}")
+        ds["a"] = BaseType("a", np.arange(20.).reshape(4, 5) + 100 * i, dims=("y", "x"))
+        ds["b"] = BaseType("b", -np.arange(20.).reshape(4, 5), dims=("y", "x"))
+        handlers[f"/granule{i}.nc"] = BaseHandler(ds)
+    requests = []
+
+    def app(environ, start_response):
+        path, query = environ["PATH_INFO"], urllib.parse.unquote(environ["QUERY_STRING"])
+        requests.append((path, query, environ.get("HTTP_AUTHORIZATION")))
+        return handlers[path.rsplit(".", 1)[0]](environ, start_response)
+
+    httpd = make_server("127.0.0.1", 0, app, handler_class=_Quiet)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(remote, "cache_dir", tmp_path.joinpath("cache"))
+    monkeypatch.setattr(remote, "cache_max_bytes", 10 * 2**20)
+    yield [f"http://127.0.0.1:{httpd.server_port}{path}" for path in sorted(handlers)], requests
+    httpd.shutdown()
+    httpd.server_close()
+
+# Data requests: (granule, constraint expression)
+def data_requests(requests):
+    return [(path.rsplit(".", 1)[0], query) for path, query, auth in requests if path.endswith(".dods")]
+
+def test_subset_is_sent_as_a_constraint(server):
+    urls, requests = server
+    first = remote.fetch(urls[0], ["a"], {"y":slice(1, 3), "x":[0, 4]}, auth=("u", "p"))
+    np.testing.assert_array_equal(first.a.values, [[5., 9.], [10., 14.]])
+    assert list(first.data_vars) == ["a"]
+    # Only a is requested, over rows 1-2 and the columns spanning those asked for
+    assert data_requests(requests) == [("/granule0.nc", "a[1:1:2][0:1:4]")]
+    assert {auth for path, query, auth in requests} == {"Basic dTpw"}
+
+def test_cache_hit(server):
+    urls, requests = server
+    first = remote.fetch(urls[0], ["a"], {"y":slice(1, 3), "x":[0, 4]})
+    again = remote.fetch(urls[0], ["a"], {"y":slice(1, 3), "x":[0, 4]})
+    xr.testing.assert_identical(first, again)
+    assert len(data_requests(requests)) == 1
+
+def test_cache_key_is_url_variables_and_isel(server):
+    urls, requests = server
+    remote.fetch(urls[0], ["a"], {"y":slice(1, 3)})
+    remote.fetch(urls[1], ["a"], {"y":slice(1, 3)})
+    remote.fetch(urls[0], ["a", "b"], {"y":slice(1, 3)})
+    remote.fetch(urls[0], ["a"], {"y":slice(0, 3)})
+    remote.fetch(urls[0], ["a"], {"y":[1, 2]})
+    assert len([r for r in requests if r[0].endswith(".dds")]) == 5
+    # Variable order doesn't matter
+    remote.fetch(urls[0], ["b", "a"], {"y":slice(1, 3)})
+    assert len([r for r in requests if r[0].endswith(".dds")]) == 5
+
+def test_session_is_reused(server, monkeypatch):
+    urls, requests = server
+    sessions = []
+    real_open = remote.xr.backends.PydapDataStore.open
+    def open_store(url, session=None, **kwargs):
+        sessions.append(session)
+        return real_open(url, session=session, **kwargs)
+    monkeypatch.setattr(remote.xr.backends.PydapDataStore, "open", staticmethod(open_store))
+    remote.fetch_many(urls, ["a"], auth=("u", "p"), cache=False, workers=3)
+    assert len(sessions) == 3 and len({id(s) for s in sessions}) == 1
+    assert remote.session(("u", "p")) is sessions[0]
+    assert remote.session(("v", "q")) is not sessions[0]
+
+def test_least_recently_used_blocks_are_evicted(server, monkeypatch):
+    urls, requests = server
+    remote.fetch(urls[0], ["a"])
+    remote.fetch(urls[1], ["a"])
+    blocks = {u:remote._cache_file(u, ["a"], None) for u in urls}
+    size = blocks[urls[0]].stat().st_size
+    os.utime(blocks[urls[0]], (1, 1))
+    monkeypatch.setattr(remote, "cache_max_bytes", 2 * size + size // 2)
+    remote.fetch(urls[2], ["a"])
+    assert not blocks[urls[0]].exists()
+    assert blocks[urls[1]].exists() and blocks[urls[2]].exists()
+
+def test_block_removed_by_another_evictor_is_a_miss(server, monkeypatch):
+    urls, requests = server
+    remote.fetch(urls[0], ["a"])
+    block = remote._cache_file(urls[0], ["a"], None)
+    utime = os.utime
+    def evicted_first(path, *args, **kwargs):
+        if path == block:
+            block.unlink()
+        return utime(path, *args, **kwargs)
+    monkeypatch.setattr(remote.os, "utime", evicted_first)
+    np.testing.assert_array_equal(remote.fetch(urls[0], ["a"]).a.values, np.arange(20.).reshape(4, 5))
+    assert len(data_requests(requests)) == 2
+
+def test_evict_tolerates_vanishing_files(server, monkeypatch):
+    urls, requests = server
+    remote.fetch(urls[0], ["a"])
+    gone = remote.cache_dir.joinpath("gone.nc")
+    real_glob = type(remote.cache_dir).glob
+    monkeypatch.setattr(type(remote.cache_dir), "glob",
+                        lambda self, pattern: list(real_glob(self, pattern)) + [gone])
+    monkeypatch.setattr(remote, "cache_max_bytes", 0)
+    remote._evict()
+    assert os.listdir(remote.cache_dir) == []
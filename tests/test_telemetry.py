@@ -0,0 +1,47 @@
+import dataclasses
+import json
+
+import numpy as np
+import pytest
+
+from atomic_prep import engine, telemetry
+from atomic_prep.products import flight_level
+from benchmarks import fixtures
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    path = tmp_path.joinpath("log.jsonl")
+    monkeypatch.setenv("ATOMIC_PREP_LOG", str(path))
+    return lambda: [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_failed_unit_is_recorded(log):
+    with pytest.raises(ValueError):
+        with telemetry.Recorder("test", "20200101") as rec:
+            rec.stage("open")
+            raise ValueError("unreadable")
+    records = log()
+    assert [r["stage"] for r in records] == ["open", "total"]
+    assert records[-1]["failed"]
+    assert "unreadable" in records[-1]["error"]
+
+def test_peak_is_per_stage(log):
+    rec = telemetry.Recorder("test", "20200101")
+    if not rec.total.peak_reset:
+        pytest.skip("peak resident memory can't be reset here")
+    rec.stage("large")
+    a = np.ones(2**25)
+    del a
+    rec.stage("small")
+    rec.close()
+    large, small, total = log()
+    assert large["peak_rss_mb"] > small["peak_rss_mb"] + 100
+    assert total["peak_rss_mb"] == large["peak_rss_mb"]
+    assert "failed" not in total
+
+def test_flight_level_stages(log, tmp_path, monkeypatch):
+    monkeypatch.setenv("ATOMIC_PREP_FORCE", "all")
+    f = fixtures.aoc_file(tmp_path, scale=0.001)
+    spec = dataclasses.replace(flight_level.spec, input_dir=f.parent, output_dir=tmp_path.joinpath("Level_2"),
+                               zarr_export=False)
+    engine.build(spec, fixtures.flight_date)
+    assert [r["stage"] for r in log()] == ["open", "time-index", "extract", "cf-fixup", "derive", "write", "total"]
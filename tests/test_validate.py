@@ -0,0 +1,98 @@
+import json
+
+import netCDF4
+import numpy  as np
+import pytest
+
+from atomic_prep import validate
+
+#
+# Headers only: variables are defined but no data are written
+#
+def header(path, bad=()):
+    with netCDF4.Dataset(path, "w") as nc:
+        if "global" not in bad:
+            nc.setncatts({a:"x" for a in validate.required_global})
+        nc.createDimension("time", 10)
+        time = nc.createVariable("time", "f8", ("time",))
+        time.units = "seconds since" if "time-units" in bad else "seconds since 2020-01-01 00:00:00"
+        time.standard_name = "time"
+        for name, units, standard_name in [("lat", "degrees_north", "latitude"), ("lon", "degrees_east", "longitude")]:
+            v = nc.createVariable(name, "f8", ("time",))
+            v.setncatts({"units":units, "standard_name":standard_name})
+        press = nc.createVariable("press", "f4", ("time",), fill_value=np.float32(-999.))
+        press.units = "mb" if "mb" in bad else "hPa"
+        press.missing_value = np.float32(-999.)
+        count = nc.createVariable("count", "u2" if "unsigned" in bad else "i4", ("time",))
+        count.units = "1"
+    return path
+
+#
+# netCDF4 casts fill values to the variable's type as it writes them; other writers (here scipy) may not
+#
+def mistyped_fill(path):
+    from scipy.io import netcdf_file
+    with netcdf_file(path, "w") as nc:
+        for a in validate.required_global:
+            setattr(nc, a, "x")
+        nc.createDimension("time", 10)
+        press = nc.createVariable("press", "f4", ("time",))
+        press.units = "hPa"
+        press.missing_value = np.float64(-999.)
+        press.valid_min = np.int32(100)
+    return path
+
+def checks(problems, severity=None):
+    return sorted({p["check"] for p in problems if severity is None or p["severity"] == severity})
+
+def test_clean_header(tmp_path):
+    assert validate.check(header(tmp_path.joinpath("clean.nc"))) == []
+
+@pytest.mark.parametrize("bad, check, severity", [("unsigned",   "unsigned",          "error"),
+                                                  ("mb",         "units",             "warning"),
+                                                  ("time-units", "time-encoding",     "error"),
+                                                  ("global",     "global-attributes", "error")])
+def test_each_problem(tmp_path, bad, check, severity):
+    problems = validate.check(header(tmp_path.joinpath(bad + ".nc"), bad=[bad]))
+    assert checks(problems) == [check]
+    assert {p["severity"] for p in problems} == {severity}
+
+def test_fill_type(tmp_path):
+    problems = validate.check(mistyped_fill(tmp_path.joinpath("fill.nc")))
+    assert [(p["check"], p["severity"]) for p in problems] == [("fill-type", "error")] * 2
+
+def test_fix_round_trip(tmp_path):
+    path = header(tmp_path.joinpath("bad.nc"), bad=["unsigned", "mb", "global"])
+    entry = validate.validate(path, fix=True, global_attrs={a:"EUREC4A" for a in validate.required_global})
+    assert checks(entry["fixed"]) == ["global-attributes", "units", "unsigned"]
+    assert entry["errors"] == 0 and entry["problems"] == []
+    with netCDF4.Dataset(path) as nc:
+        assert nc["count"].dtype == np.int32
+        assert nc["press"].units == "hPa"
+        assert nc.campaign == "EUREC4A"
+
+def test_fix_fill_type(tmp_path):
+    path = mistyped_fill(tmp_path.joinpath("fill.nc"))
+    entry = validate.validate(path, fix=True)
+    assert checks(entry["fixed"]) == ["fill-type"]
+    assert entry["problems"] == []
+    with netCDF4.Dataset(path) as nc:
+        assert nc["press"].missing_value.dtype == np.float32
+        assert nc["press"].valid_min.dtype == np.float32
+
+def test_unfixable_problems_remain(tmp_path):
+    path = header(tmp_path.joinpath("bad.nc"), bad=["time-units", "global"])
+    entry = validate.validate(path, fix=True)
+    assert entry["fixed"] == []
+    assert checks(entry["problems"], "error") == ["global-attributes", "time-encoding"]
+
+def test_report(tmp_path):
+    files = [header(tmp_path.joinpath("clean.nc")), header(tmp_path.joinpath("bad.nc"), bad=["unsigned", "mb"]),
+             tmp_path.joinpath("missing.nc")]
+    report = tmp_path.joinpath("report.json")
+    entries = validate.run(files, report, workers=1)
+    assert [e["errors"] for e in entries] == [0, 1, 1]
+    assert entries[2]["problems"][0]["check"] == "readable"
+    with open(report) as fh:
+        summary = json.load(fh)
+    assert (summary["files"], summary["errors"], summary["warnings"]) == (3, 2, 1)
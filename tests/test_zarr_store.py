@@ -0,0 +1,64 @@
+import numpy  as np
+import xarray as xr
+
+from atomic_prep import zarr_store
+
+def flight_file(directory, flight, n, value=1.):
+    t0 = np.datetime64(f"{flight[:4]}-{flight[4:6]}-{flight[6:]}T12:00:00", "ns")
+    ds = xr.Dataset({"ta":("time", np.full(n, value))},
+                    coords={"time":t0 + np.arange(n) * np.timedelta64(1, "s")})
+    f = directory.joinpath(f"product_{flight}_v1.nc")
+    ds.to_netcdf(f)
+    return f
+
+def stored(store):
+    with xr.open_zarr(store, consolidated=True) as ds:
+        return ds.load()
+
+def test_flights_are_kept_in_time_order(tmp_path):
+    store = tmp_path.joinpath("product.zarr")
+    later   = flight_file(tmp_path, "20200205", 10)
+    earlier = flight_file(tmp_path, "20200203", 5)
+    zarr_store.update(store, {"20200205":(later, "a")})
+    zarr_store.update(store, {"20200203":(earlier, "b")})
+    ds = stored(store)
+    assert (np.diff(ds.time.values) > np.timedelta64(0)).all()
+    assert list(np.unique(ds.flight.values)) == ["20200203", "20200205"]
+    assert ds.sel(time=slice("2020-02-05", "2020-02-06")).sizes["time"] == 10
+    index = zarr_store.read_index(store)
+    assert index["20200203"] == {"start":0, "stop":5, "key":"b", "file":str(earlier.resolve())}
+    assert (index["20200205"]["start"], index["20200205"]["stop"]) == (5, 15)
+
+def test_same_length_is_overwritten_in_place(tmp_path):
+    store = tmp_path.joinpath("product.zarr")
+    files = {d:(flight_file(tmp_path, d, 4), "a") for d in ["20200203", "20200205"]}
+    zarr_store.update(store, files)
+    zarr_store.update(store, {"20200203":(flight_file(tmp_path, "20200203", 4, value=2.), "b")})
+    ds = stored(store)
+    np.testing.assert_array_equal(ds.ta.values, [2.] * 4 + [1.] * 4)
+    assert zarr_store.read_index(store)["20200203"]["key"] == "b"
+
+def test_changed_length_rebuilds_the_store(tmp_path):
+    store = tmp_path.joinpath("product.zarr")
+    files = {d:(flight_file(tmp_path, d, 4), "a") for d in ["20200203", "20200205"]}
+    zarr_store.update(store, files)
+    zarr_store.update(store, {"20200203":(flight_file(tmp_path, "20200203", 7, value=2.), "b")})
+    ds = stored(store)
+    np.testing.assert_array_equal(ds.ta.values, [2.] * 7 + [1.] * 4)
+    index = zarr_store.read_index(store)
+    assert (index["20200205"]["start"], index["20200205"]["stop"], index["20200205"]["key"]) == (7, 11, "a")
+
+def test_unchanged_keys_are_skipped(tmp_path):
+    store = tmp_path.joinpath("product.zarr")
+    f = flight_file(tmp_path, "20200203", 4)
+    zarr_store.update(store, {"20200203":(f, "a")})
+    f.unlink()
+    zarr_store.update(store, {"20200203":(f, "a")})
+    assert stored(store).sizes["time"] == 4
+
+def test_stores_are_zarr_format_2(tmp_path, recwarn):
+    store = tmp_path.joinpath("product.zarr")
+    zarr_store.update(store, {d:(flight_file(tmp_path, d, 4), "a") for d in ["20200203", "20200205"]})
+    assert store.joinpath(".zgroup").exists() and store.joinpath(".zmetadata").exists()
+    assert not store.joinpath("zarr.json").exists()
+    assert not [w for w in recwarn if "zarr" in type(w.message).__module__]
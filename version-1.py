@@ -0,0 +1,36 @@
+#
+# Update attributes (version, activity -> project) and rename files for version 1.0 of the archive
+#   (previously done with ncatted and zmv run from zsh)
+#
+import pathlib
+
+from atomic_prep import attributes, parallel
+
+version = "v1.0"
+n_workers = parallel.default_workers()
+
+#
+# Directory, pattern matching existing file names, new file names
+#
+renames = [("AXBT/Level_2",         r"(.*)_v(.*)\.nc",                   r"EUREC4A_ATOMIC_\1_" + version + ".nc"),
+           ("AXBT/Level_3",         r"(.*)_v(.*)\.nc",                   r"EUREC4A_ATOMIC_\1_" + version + ".nc"),
+           ("Flight-Level/Level_2", r"P3_Flight-Level_(.*)_v(.*)\.nc",   r"EUREC4A_ATOMIC_P3_Flight-level_\1_" + version + ".nc"),
+           ("Remote-sensing",       r"(.*)_v(.*)\.nc",                   r"\1_" + version + ".nc"),
+           ("W-band-radar",         r"(.*)_v(.*)\.nc",                   r"EUREC4A_\1_" + version + ".nc"),
+           ("WSRA",                 r"(.*)_v(.*)\.nc",                   r"EUREC4A_ATOMIC_\1_" + version + ".nc")]
+
+def update(job):
+    f, pattern, replacement = job
+    return attributes.patch(f,
+                            global_attrs  = {"version":version, "project":"ATOMIC"},
+                            delete_global = ["activity"],
+                            rename        = (pattern, replacement))
+
+if __name__ == "__main__":
+    jobs = [(f, pattern, replacement) for d, pattern, replacement in renames
+                                      for f in sorted(pathlib.Path(d).glob("*.nc"))]
+    results, failures = parallel.run(update, jobs, n_workers)
+    if pathlib.Path("Flight-Level").exists():
+        pathlib.Path("Flight-Level").rename("Flight-level")
+    if failures:
+        raise SystemExit(1)